@@ -1,26 +1,137 @@
 import os
-import shutil
+import re
+import subprocess
 from pathlib import Path
-import uuid
+import unicodedata
 from python_segments.FileManager import FileManager
+from python_segments.BuildManifest import BuildManifest
+from python_segments.SearchIndex import SearchIndex
+from python_segments.LinkResolver import LinkResolver
+from python_segments.LinkGraph import LinkGraph
+from python_segments.Profiler import Profiler
+from python_segments.YamlCache import YamlCache
+from python_segments.BaseQuery import BaseQuery
+from python_segments.AttachmentExporter import AttachmentExporter
+from python_segments.StaticAssets import StaticAssets
+from python_segments.Vendor import Vendor, SCRIPTS, CDN_SCRIPTS
 import json
 import yaml
-from datetime import datetime
+import hashlib
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+PROFILE_NAME = ".omth-profile.json"
+ASSET_NAMES = ("style.css", "canvas.css", "canvas.js", "searcher.js", "renderer.js")
+# renderer.js carries the vault's data, so its hash changes with every edit; a fingerprinted name
+# would rewrite every page on each export, so it keeps its plain name
+FINGERPRINTED_ASSETS = ("style.css", "canvas.css", "canvas.js", "searcher.js")
+FRONTMATTER_PATTERN = re.compile(r'\A---\r?\n(.*?)^---[ \t]*(?:\r?\n|\Z)', re.DOTALL | re.MULTILINE)
+# What processMath and the Mermaid loader in the page pick up, used to load those libraries only where needed
+MATH_PATTERN = re.compile(r'\$[^$]+\$')
+MERMAID_FENCE = "```mermaid"
 
 class ObsidianMarkdownToHtml:
-    def __init__(self, in_directory, out_directory):
+    def __init__(self, in_directory, out_directory, shard_contents=False, incremental=False, build_date=None, jobs=1,
+                 ignore_patterns=None, scan_snapshot=False, prerender=False, marked_path=None, ingest_cache=None,
+                 profile=False, cprofile_path=None, attachment_mode="copy", attachment_check="stat",
+                 fingerprint_assets=False, compress=None, vendor_directory=None):
         if not os.path.exists(in_directory):
             raise ValueError(f"Input directory does not exist: {in_directory}")
+        if compress is not None and compress not in range(1, 10):
+            raise ValueError(f"Compression level must be 1-9: {compress}")
+
+        self.vendor = Vendor(vendor_directory) if vendor_directory else None
+        if self.vendor:
+            self.vendor.check()
 
         self.in_directory = os.path.abspath(in_directory)
         self.out_directory = os.path.abspath(out_directory)
+        self.shard_contents = shard_contents
+        self.incremental = incremental
+        self.build_date = build_date
+        self.footer = self.footer_date()
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.prerender = prerender
+        self.attachment_mode = attachment_mode
+        self.fingerprint_assets = fingerprint_assets
+        self.compress = compress
+        self.asset_names = {}
+        if not marked_path and self.vendor:
+            # Prerender with the same pinned marked the pages would have loaded
+            marked_path = self.vendor.directory / SCRIPTS["marked"]
+        self.marked_path = os.path.abspath(marked_path) if marked_path else None
+        self.ingest_cache = ingest_cache
+        self.profiler = Profiler(enabled=bool(profile), cprofile_path=cprofile_path)
+        # A cProfile dump alone still gets the JSON report, in the default place
+        self.profile_path = profile if profile and profile is not True else os.path.join(self.out_directory, PROFILE_NAME)
+        self.manifest = BuildManifest(self.out_directory, self.build_fingerprint())
+        self.yaml_cache = YamlCache(self.out_directory)
+        self.attachment_exporter = AttachmentExporter(attachment_mode, attachment_check, self.jobs, self.profiler)
+
+        self.FileManager = FileManager(self.in_directory, self.out_directory,
+                                       ignore_patterns=ignore_patterns, scan_snapshot=scan_snapshot)
+        with self.profiler.phase("scan"):
+            self.files, self.link_to_filepath = self.FileManager.add_dirs_to_dict()
+        self.profiler.count("files", len(self.files))
+
+        with self.profiler.phase("content_mapping"):
+            self.create_file_content_mapping()
+
+        with self.profiler.phase("base_views"):
+            self.base_views = self.evaluate_base_views()
 
-        self.FileManager = FileManager(self.in_directory, self.out_directory)
-        self.files, self.link_to_filepath = self.FileManager.add_dirs_to_dict()
+        with self.profiler.phase("write_renderer"):
+            self.write_renderer()
 
-        self.create_file_content_mapping()
+        with self.profiler.phase("write_search_index"):
+            self.write_search_index()
+
+    def build_fingerprint(self):
+        """Hash of everything besides the sources that shapes the generated pages"""
+        fingerprint = hashlib.sha1(Path(__file__).read_bytes())
+        fingerprint.update(repr((self.build_date, self.prerender, self.attachment_mode, self.vendor is not None)).encode('utf-8'))
+        return fingerprint.hexdigest()
+
+    def footer_date(self):
+        """Date stamped in the page footer: pinned, omitted (False), SOURCE_DATE_EPOCH, or today"""
+        if self.build_date is False:
+            return None
+        if self.build_date is not None:
+            return str(self.build_date)
+        source_date_epoch = os.environ.get("SOURCE_DATE_EPOCH")
+        if source_date_epoch:
+            try:
+                return datetime.fromtimestamp(int(source_date_epoch), tz=timezone.utc).strftime("%m/%d/%Y")
+            except (ValueError, OverflowError, OSError):
+                print(f"Warning: Ignoring SOURCE_DATE_EPOCH={source_date_epoch!r}, which is not a Unix timestamp; using today's date")
+        return datetime.now().strftime("%m/%d/%Y")
+
+    def assign_file_ids(self):
+        """Derive a stable short ID for every file from its normalized vault-relative path"""
+        full_hashes = {}
+        for file_path in self.files:
+            normalized = unicodedata.normalize('NFC', file_path[2:].replace('\\', '/'))
+            full_hashes[file_path] = hashlib.sha1(normalized.encode('utf-8')).hexdigest()
 
-        self.write_renderer()
+        # Lengthen only the IDs whose short prefix collides, so the rest stay put as the vault grows
+        length = 10
+        file_ids = {file_path: digest[:length] for file_path, digest in full_hashes.items()}
+        while len(set(file_ids.values())) != len(file_ids):
+            length += 4
+            seen = {}
+            for file_path, file_id in file_ids.items():
+                seen.setdefault(file_id, []).append(file_path)
+            for colliding in (paths for paths in seen.values() if len(paths) > 1):
+                for file_path in colliding:
+                    file_ids[file_path] = full_hashes[file_path][:length]
+        return file_ids
+
+    def source_path(self, file_path):
+        """OS path of a vault file given its '.\\dir\\file' key"""
+        if file_path.startswith('.\\') or file_path.startswith('./'):
+            file_path = file_path[2:]
+        return os.path.join(self.in_directory, *file_path.replace('/', '\\').split('\\'))
 
     def make_offset(self, file_path):
         if file_path.startswith('.\\') or file_path.startswith('./'):
@@ -39,134 +150,246 @@ class ObsidianMarkdownToHtml:
     def write_renderer(self):
         src_path = (Path(__file__).resolve().parent / "scripts/renderer.js").resolve()
         dst_path = Path(self.out_directory) / 'renderer.js'
+        dst_path.parent.mkdir(parents=True, exist_ok=True)
         with open(src_path, "r", encoding='utf-8') as f_in:
             content = f_in.read()
 
-        content = content.replace("{/*file_links*/}", json.dumps(self.link_to_filepath))
-        content = content.replace("{/*file_content_map*/}", json.dumps(self.file_content_map))
-        content = content.replace("{/*file_contents*/}", json.dumps(self.file_contents))
-        content = content.replace("{/*file_properties*/}", json.dumps(self.file_properties))
-        content = content.replace("/*in_directory*/0", json.dumps(self.in_directory))
-        content = content.replace("/*out_directory*/0", json.dumps(self.out_directory))
+        if self.shard_contents:
+            inline_contents = {}
+            content_shards = self.write_content_shards()
+        else:
+            inline_contents = self.file_contents
+            content_shards = {}
 
+        placeholders = {
+            "{/*file_hrefs*/}": self.file_hrefs(),
+            "{/*link_index*/}": self.link_resolver.lookup,
+            "{/*link_graph*/}": self.link_graph.to_json(),
+            "{/*base_views*/}": self.base_views,
+            "{/*file_contents*/}": inline_contents,
+            "{/*file_content_shards*/}": content_shards,
+            "/*search_index_sharded*/false": self.shard_contents,
+            "{/*file_properties*/}": self.file_properties,
+            "/*in_directory*/0": self.in_directory,
+            "/*out_directory*/0": self.out_directory,
+        }
+
+        # The template is split at its placeholders and each payload is streamed entry by entry,
+        # so the full serialized vault never has to exist as one string
+        pattern = "(" + "|".join(re.escape(placeholder) for placeholder in placeholders) + ")"
         with open(dst_path, "w", encoding='utf-8') as f_out:
-            f_out.write(content)
+            for segment in re.split(pattern, content):
+                if segment in placeholders:
+                    self.stream_json(f_out, placeholders[segment])
+                else:
+                    f_out.write(segment)
+        self.profiler.record_output(dst_path)
+
+    @staticmethod
+    def stream_json(f_out, value):
+        """Write value as json.dumps would, but one top-level entry at a time"""
+        if not isinstance(value, dict):
+            f_out.write(json.dumps(value))
+            return
+        f_out.write("{")
+        for index, (key, entry) in enumerate(value.items()):
+            if index:
+                f_out.write(", ")
+            f_out.write(json.dumps(str(key)))
+            f_out.write(": ")
+            f_out.write(json.dumps(entry))
+        f_out.write("}")
+
+    def write_search_index(self):
+        """Build the content search index, split by token prefix when contents are sharded"""
+        search_index = SearchIndex()
+        for file_path in self.files:
+            if file_path.endswith('.md'):
+                unique_id = self.file_ids[file_path]
+                search_index.add(unique_id, self.file_contents.get(unique_id, ""))
+            elif file_path.endswith('.canvas'):
+                unique_id = self.file_ids[file_path]
+                search_index.add(unique_id, SearchIndex.canvas_text(self.file_contents.get(unique_id, "")))
+        for written_path in search_index.write(self.out_directory, sharded=self.shard_contents):
+            self.profiler.record_output(written_path)
+
+    def write_content_shards(self):
+        """Write each file's content to its own content-addressed JSON shard, returning id -> shard name"""
+        shard_dir = Path(self.out_directory) / 'content'
+        shard_dir.mkdir(parents=True, exist_ok=True)
+
+        content_shards = {}
+        for unique_id, file_content in self.file_contents.items():
+            payload = json.dumps(file_content)
+            shard_name = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+            content_shards[unique_id] = shard_name
+
+            shard_path = shard_dir / f"{shard_name}.json"
+            if not shard_path.exists():
+                with open(shard_path, "w", encoding='utf-8') as f_out:
+                    f_out.write(payload)
+                self.profiler.record_output(shard_path)
+
+        # Shards are content-addressed, so anything not referenced by this build is stale
+        live_shards = set(content_shards.values())
+        for shard_path in shard_dir.glob('*.json'):
+            if shard_path.stem not in live_shards:
+                shard_path.unlink()
+
+        return content_shards
+
+    def ingest_file(self, file_path):
+        """Read and parse one source file; safe to run on a worker thread"""
+        full_path = self.source_path(file_path)
+        source = {"mtime": None, "size": None, "hash": None, "notes": None, "content": None, "error": None}
+        try:
+            # Reuse the scanner's DirEntry stat when it has one
+            source["mtime"], source["size"] = self.FileManager.file_stats.get(file_path) or self.manifest.stat(full_path)
+        except OSError:
+            pass
+
+        # A watch session keeps parsed sources between builds; a file whose stat is unchanged is not read again
+        stamp = (source["mtime"], source["size"])
+        cached = self.ingest_cache.get(file_path) if self.ingest_cache is not None else None
+        if cached is not None and source["mtime"] is not None and cached[0] == stamp:
+            self.profiler.count("ingest_cache_hits")
+            self.yaml_cache.keep("base" if file_path.endswith('.base') else "frontmatter", cached[1]["hash"])
+            return cached[1]
+
+        parse_started = time.perf_counter()
+
+        if file_path.endswith('.base'):
+            try:
+                with open(full_path, 'r', encoding='utf-8') as f:
+                    yaml_content = f.read()
+                    source["hash"] = self.manifest.hash_text(yaml_content)
+                    source["content"], hit = self.yaml_cache.parse_base(yaml_content, source["hash"])
+                    self.profiler.count("yaml_cache_hits" if hit else "yaml_parsed")
+            except Exception as e:
+                source["error"] = f"Error parsing YAML file {full_path}: {e}"
+                source["content"] = "{}"
+        elif file_path.endswith(('.md', '.canvas')):
+            try:
+                with open(full_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                    source["hash"] = self.manifest.hash_text(content)
+
+                    frontmatter = FRONTMATTER_PATTERN.match(content)
+                    if frontmatter:
+                        content = content[frontmatter.end():]
+                        try:
+                            source["notes"], hit = self.yaml_cache.parse_frontmatter(frontmatter.group(1), source["hash"])
+                            self.profiler.count("yaml_cache_hits" if hit else "yaml_parsed")
+                        # PyYAML raises a plain ValueError for values like an impossible date (2024-02-30)
+                        except (yaml.YAMLError, ValueError) as e:
+                            source["error"] = f"Warning: Ignoring invalid frontmatter in {full_path}: {e}"
+
+                    source["content"] = content
+            except Exception as e:
+                source["error"] = f"Error reading file {full_path}: {e}"
+        else:
+            # For non-markdown files, store empty content but keep the mapping
+            source["content"] = ""
+        if file_path.endswith(('.md', '.canvas', '.base')):
+            self.profiler.record_file(file_path[2:], time.perf_counter() - parse_started, source["size"])
+
+        if self.ingest_cache is not None and source["mtime"] is not None and not source["error"]:
+            self.ingest_cache[file_path] = (stamp, source)
+        return source
+
+    def map_jobs(self, function, items):
+        """Map function over items on the worker pool (or inline for jobs=1), preserving order"""
+        if self.jobs <= 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            return list(executor.map(function, items))
 
     def create_file_content_mapping(self):
         """Create a mapping of file paths to their content for client-side access"""
         self.file_properties = {}
-        self.file_content_map = {}
         self.file_contents = {}
-        filename_counts = {}
-        basename_counts = {}  # Track basenames separately
-        
+        self.file_ids = self.assign_file_ids()
+
         for file_path in self.files:
-            unique_id = str(uuid.uuid4())
+            unique_id = self.file_ids[file_path]
             self.file_properties[unique_id] = {}
             self.file_properties[unique_id]["path"] = file_path[2:]
             self.file_properties[unique_id]["file"] = file_path.split('\\')[-1]
             self.file_properties[unique_id]["folder"] = file_path[2:].rsplit('\\', 1)[0].replace("\\", "/")
             self.file_properties[unique_id]["ext"] = file_path.split('.')[-1]
-            if file_path.startswith('.\\') or file_path.startswith('./'):
-                    relative_path = file_path[2:]
-            else:
-                relative_path = file_path
-            
-            # Always map the full relative path
-            self.file_content_map[relative_path] = unique_id
-            
-            # Track filename with extension
-            filename_with_ext = os.path.basename(relative_path)
-            filename_without_ext = os.path.splitext(filename_with_ext)[0]
-            
-            if filename_with_ext not in filename_counts:
-                filename_counts[filename_with_ext] = []
-            filename_counts[filename_with_ext].append((relative_path, unique_id))
-            
-            if filename_without_ext not in basename_counts:
-                basename_counts[filename_without_ext] = []
-            basename_counts[filename_without_ext].append((relative_path, unique_id))
 
-            full_path = os.path.join(self.in_directory, relative_path.replace('/', os.sep))
+        # Exact, lowercase, basename and folder-qualified keys, resolved once for the build and the client
+        with self.profiler.phase("link_index"):
+            self.link_resolver = LinkResolver(self.files, self.file_ids)
+
+        if self.ingest_cache is not None:
+            for stale in set(self.ingest_cache) - set(self.files):
+                del self.ingest_cache[stale]
+
+        # Reading and parsing is independent per file, so it can fan out; merging stays in file order
+        with self.profiler.phase("ingest"):
+            sources = self.map_jobs(self.ingest_file, self.files)
+        for file_path, source in zip(self.files, sources):
+            unique_id = self.file_ids[file_path]
+            self.manifest.record(file_path, source["mtime"], source["size"], source["hash"])
+            if source["notes"] is not None:
+                self.file_properties[unique_id]["notes"] = source["notes"]
+            if source["content"] is not None:
+                self.file_contents[unique_id] = source["content"]
+            if source["error"]:
+                self.profiler.count("ingest_errors")
+                print(source["error"])
+        self.yaml_cache.save()
+
+        # Links are parsed once here; backlinks, embed order and incremental deps all come from the graph
+        with self.profiler.phase("link_graph"):
+            self.link_graph = LinkGraph(self.link_resolver)
+            for file_path in self.files:
+                if file_path.endswith(('.md', '.canvas')):
+                    unique_id = self.file_ids[file_path]
+                    self.link_graph.add(unique_id, self.file_contents.get(unique_id, ""))
+                    self.manifest.set_deps(file_path, self.extract_dependencies(unique_id))
+        self.report_link_problems()
+
+    def evaluate_base_views(self):
+        """Filter and sort every .base view at build time, returning base ID -> row links per view"""
+        query = None
+        base_views = {}
+        for file_path in self.files:
             if file_path.endswith('.base'):
+                unique_id = self.file_ids[file_path]
+                base = json.loads(self.file_contents.get(unique_id) or "{}")
+                if not isinstance(base, dict):
+                    continue
+                # The property indexes are built lazily and shared by every base
+                query = query or BaseQuery(self.file_properties, self.link_resolver)
                 try:
-                    with open(full_path, 'r', encoding='utf-8') as f:
-                        yaml_content = f.read()
-                        parsed_yaml = yaml.load(yaml_content, Loader=yaml.FullLoader)
-                        self.file_contents[unique_id] = json.dumps(parsed_yaml)
+                    base_views[unique_id] = query.evaluate(base)
                 except Exception as e:
-                    print(f"Error parsing YAML file {full_path}: {e}")
-                    self.file_contents[unique_id] = "{}"
-            elif file_path.endswith(('.md', '.canvas')):
-                
-                try:
-                    with open(full_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-
-                        if content.startswith('---\n'):
-                            end_idx = content.find('\n---\n', 4)
-                            if end_idx != -1:
-                                prop_set = {}
-                                for line in content[:end_idx + 5].split('\n')[1:-2]:
-                                    key, val = line.split(": ")
-                                    prop_set[key] = val[1:-1]
-                                self.file_properties[unique_id]["notes"] = prop_set
-                                content = content[end_idx + 5:]
-
-                        self.file_contents[unique_id] = content
-                
-                except Exception as e:
-                    print(f"Error reading file {full_path}: {e}")
-            else:
-                # For non-markdown files, store empty content but keep the mapping
-                self.file_contents[unique_id] = ""
-        
-        # Handle filename mappings - prefer full filename with extension
-        for filename_with_ext, file_list in filename_counts.items():
-            if len(file_list) == 1:
-                self.file_content_map[filename_with_ext] = file_list[0][1]
-            else:
-                # Multiple files with same name+extension - use first one and warn
-                self.file_content_map[filename_with_ext] = file_list[0][1]
-                print(f"Warning: Multiple files with name '{filename_with_ext}' found. Using: {file_list[0][0]}")
-                print(f"  Conflicting files: {[item[0] for item in file_list]}")
-        
-        # Handle basename mappings - only if no conflicts with extensions
-        for basename, file_list in basename_counts.items():
-            if len(file_list) == 1:
-                # Only one file with this basename - safe to map without extension
-                self.file_content_map[basename] = file_list[0][1]
-            else:
-                # Multiple files with same basename - check if any are .md
-                md_files = [item for item in file_list if item[0].endswith('.md')]
-                if len(md_files) == 1:
-                    # Only one .md file with this basename - use it for extension-less mapping
-                    self.file_content_map[basename] = md_files[0][1]
-                    print(f"Info: Multiple files with basename '{basename}' found. Using .md file for extension-less access: {md_files[0][0]}")
-                    print(f"  Other files: {[item[0] for item in file_list if item != md_files[0]]}")
-                    print(f"  Access non-md files using their full names with extensions.")
-                else:
-                    # Multiple files, no single .md - use first one but warn
-                    self.file_content_map[basename] = file_list[0][1]
-                    print(f"Warning: Multiple files with basename '{basename}' found. Using: {file_list[0][0]}")
-                    print(f"  Conflicting files: {[item[0] for item in file_list]}")
-                    print(f"  Access other files using their full names with extensions.")
+                    print(f"Error evaluating base {file_path[2:]}: {e}")
+        return base_views
 
-    def build_html_with_raw_markdown(self, title, offset, data_current_file, type="md"):
-        """Build HTML page with raw markdown that will be processed by marked.js"""
+    def extract_dependencies(self, unique_id):
+        """Map every wikilink/embed target of a file to the vault-relative path it resolves to (or None)"""
+        return {target: self.file_properties[resolved]["path"] if resolved else None
+                for target, resolved in self.link_graph.links.get(unique_id, {}).items()}
 
-        return f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta name="viewport" content="width=device-width, initial-scale=1.0" charset="UTF-8">
-    <title>{title}</title>
-    <link rel="preconnect" href="https://rsms.me/">
-    <link rel="preconnect" href="https://rsms.me/inter/inter.css">
-    <link rel="stylesheet" href="{offset}/style.css">
-    {f'<link rel="stylesheet" href="{offset}/canvas.css">' if type == "canvas" else ''}
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/marked/4.3.0/marked.min.js"></script>
-    
-    <script>
+    def report_link_problems(self):
+        """Print broken links and embed cycles found while building the link graph"""
+        for unique_id, targets in self.link_graph.broken.items():
+            for target in targets:
+                print(f"Warning: Broken link [[{target}]] in {self.file_properties[unique_id]['path']}")
+        for cycle in self.link_graph.embed_cycles():
+            paths = [self.file_properties[unique_id]["path"] for unique_id in cycle]
+            print(f"Warning: Embed cycle: {' -> '.join(paths + paths[:1])}")
+
+    def asset_url(self, name):
+        """Name a page uses for a shared asset, fingerprinted when fingerprint_assets is on"""
+        return self.asset_names.get(name, name)
+
+    def mathjax_html(self, offset):
+        """MathJax configuration and loader for pages with math"""
+        return f"""<script>
         // Configure MathJax before loading the library
         window.MathJax = {{
             tex: {{
@@ -189,31 +412,12 @@ class ObsidianMarkdownToHtml:
             }}
         }};
     </script>
-    <script id="MathJax-script" async src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>
-</head>
-<body>
-    <nav>
-        <span>
-            <button popovertarget="navbar" popovertargetaction="toggle"><i data-lucide="align-justify"></i></button>
-            <div id="navbar" popover></div>
-            <button popovertarget="searchbar" popovertargetaction="toggle"><i data-lucide="search"></i></button>
-            <div id="searchbar" popover></div>
-        </span>
-        <p class="top-bar">{(data_current_file.split('.')[0] + '.html' if data_current_file.split('.')[-1] == "md" else data_current_file + '.html').replace("\\", "<span class=\"file-link\"> > </span>")}</p>
-        <button popovertarget="table-of-contents" popovertargetaction="toggle"><i data-lucide="table-of-contents"></i></button>
-        <div id=\"table-of-contents\" style=\"display: none\" popover><div id=\"toc-content\"></div></div>
-    </nav>
-    <h1 class="file-title">{title}{'.' + type if type ==  "canvas" or type == "base" else ''}</h1>
-    <article data-current-file="{data_current_file}" data-type="{type}"></article>
-    <footer>
-        <p>Generated with the <a target="_blank" href="https://github.com/Ishancorp/ObsidianMarkdownToHtml">Obsidian Markdown to HTML script</a></p>
-        <p>Last updated on {datetime.now().strftime("%m/%d/%Y")}</p>
-    </footer>
-    <script src="{offset}/renderer.js"></script>
-    <script src="{offset}/searcher.js"></script>
-    {f'<script src="{offset}/canvas.js"></script>' if type == "canvas" else ''}
-    <script src="https://unpkg.com/lucide@latest"></script>
-    <script>
+    <script id="MathJax-script" async src="{self.script_url(offset, 'mathjax')}"></script>
+"""
+
+    def mermaid_html(self, offset):
+        """Mermaid loader for pages with ```mermaid fences"""
+        return f"""<script>
         // Mobile-compatible Mermaid loading
         (function() {{
             // Check if we're on a mobile device
@@ -222,7 +426,7 @@ class ObsidianMarkdownToHtml:
             // Load mermaid
             const script = document.createElement('script');
             script.type = 'text/javascript';
-            script.src = 'https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.min.js';
+            script.src = '{self.script_url(offset, "mermaid")}';
             script.onload = function() {{
                 mermaid.initialize({{
                     startOnLoad: false,
@@ -230,7 +434,7 @@ class ObsidianMarkdownToHtml:
                     securityLevel: 'loose'  // Needed for some mobile browsers
                 }});
 
-                document.addEventListener("DOMContentLoaded", function() {{
+                const renderMermaid = function() {{
                     // Replace only ```mermaid fences
                     const walker = document.createTreeWalker(
                         document.body,
@@ -269,7 +473,13 @@ class ObsidianMarkdownToHtml:
                             console.log('Mermaid rendering skipped on mobile:', e);
                         }}
                     }}, 100);
-                }});
+                }};
+                // A local copy can finish loading after the DOM is ready, when the event has already fired
+                if (document.readyState === 'loading') {{
+                    document.addEventListener("DOMContentLoaded", renderMermaid);
+                }} else {{
+                    renderMermaid();
+                }}
             }};
             script.onerror = function() {{
                 console.log('Mermaid failed to load, continuing without it');
@@ -277,60 +487,260 @@ class ObsidianMarkdownToHtml:
             document.head.appendChild(script);
         }})();
     </script>
+"""
+
+    def build_html_with_raw_markdown(self, title, offset, data_current_file, type="md", prerendered=None, libraries=("mathjax", "mermaid")):
+        """Build HTML page with raw markdown that will be processed by marked.js, or with the (html, toc) prerendered at build time.
+
+        MathJax and Mermaid are only loaded when named in libraries.
+        """
+        article_html, toc_html = prerendered or ("", "")
+
+        return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta name="viewport" content="width=device-width, initial-scale=1.0" charset="UTF-8">
+    <title>{title}</title>
+    <link rel="preconnect" href="https://rsms.me/">
+    <link rel="preconnect" href="https://rsms.me/inter/inter.css">
+    <link rel="stylesheet" href="{offset}/{self.asset_url("style.css")}">
+    {f'<link rel="stylesheet" href="{offset}/{self.asset_url("canvas.css")}">' if type == "canvas" else ''}
+    {'' if prerendered else f'<script src="{self.script_url(offset, "marked")}"></script>'}
+    {self.mathjax_html(offset) if "mathjax" in libraries else ''}
+</head>
+<body>
+    <nav>
+        <span>
+            <button popovertarget="navbar" popovertargetaction="toggle"><i data-lucide="align-justify"></i></button>
+            <div id="navbar" popover></div>
+            <button popovertarget="searchbar" popovertargetaction="toggle"><i data-lucide="search"></i></button>
+            <div id="searchbar" popover></div>
+        </span>
+        <p class="top-bar">{(data_current_file.split('.')[0] + '.html' if data_current_file.split('.')[-1] == "md" else data_current_file + '.html').replace("\\", "<span class=\"file-link\"> > </span>")}</p>
+        <button popovertarget="table-of-contents" popovertargetaction="toggle"><i data-lucide="table-of-contents"></i></button>
+        <div id=\"table-of-contents\"{'' if toc_html else ' style="display: none"'} popover><div id=\"toc-content\">{toc_html}</div></div>
+    </nav>
+    <h1 class="file-title">{title}{'.' + type if type ==  "canvas" or type == "base" else ''}</h1>
+    <article data-current-file="{data_current_file}" data-type="{type}"{' data-prerendered="true"' if prerendered else ''}>{article_html}</article>
+    <section id="backlinks" style="display: none"></section>
+    <footer>
+        <p>Generated with the <a target="_blank" href="https://github.com/Ishancorp/ObsidianMarkdownToHtml">Obsidian Markdown to HTML script</a></p>
+        {f'<p>Last updated on {self.footer}</p>' if self.footer else ''}
+    </footer>
+    <script src="{offset}/{self.asset_url("renderer.js")}"></script>
+    <script src="{offset}/{self.asset_url("searcher.js")}"></script>
+    {f'<script src="{offset}/{self.asset_url("canvas.js")}"></script>' if type == "canvas" else ''}
+    <script src="{self.script_url(offset, "lucide")}"></script>
+    {self.mermaid_html(offset) if "mermaid" in libraries else ''}
 </body>
 </html>"""
 
     def compile_webpages(self):
         """Compile all files (.md, .canvas, .base) to HTML - unified pipeline with client-side processing"""
+        # Shared assets are written first so pages can reference their fingerprinted names
+        with self.profiler.phase("assets"):
+            self.FileManager.write_files(self.out_directory)
+            static_assets = StaticAssets(self.out_directory)
+            if self.fingerprint_assets:
+                self.asset_names = static_assets.fingerprint(FINGERPRINTED_ASSETS)
+            static_assets.remove_fingerprints(ASSET_NAMES, keep=self.asset_names.values())
+            self.manifest.set_assets(self.asset_names)
+            if self.vendor:
+                self.vendor.install(self.out_directory)
+
+        with self.profiler.phase("plan"):
+            dirty, exports = self.plan_exports()
+        self.profiler.count("files_skipped", len(self.files) - len(exports))
+
+        if self.prerender:
+            with self.profiler.phase("prerender"):
+                pages = [page for _, _, page in exports if page is not None]
+                for page, prerendered in zip(pages, self.prerender_pages(pages)):
+                    page["prerendered"] = prerendered
+
+        # Writes and copies run on the worker pool; results are recorded and reported in file order
+        with self.profiler.phase("export"):
+            results = self.map_jobs(self.export_file, exports)
+        self.attachment_exporter.close()
+        for (file, _, page), (written_path, error) in zip(exports, results):
+            if error:
+                self.profiler.count("export_errors")
+                print(error)
+            else:
+                if page is not None:
+                    self.profiler.count("pages_written")
+                    self.profiler.record_output(written_path)
+                self.manifest.add_output(file, written_path)
+
+        with self.profiler.phase("finish"):
+            self.manifest.remove_stale_outputs()
+            self.manifest.save()
+
+            if self.incremental:
+                print(f"Compiled ({len(dirty)} of {len(self.files)} files changed or affected)")
+            else:
+                print("Compiled")
+
+        if self.compress:
+            with self.profiler.phase("compress"):
+                StaticAssets(self.out_directory).compress(self.compress, self.map_jobs, self.profiler)
+
+        if self.profiler.enabled:
+            self.profiler.write(self.profile_path)
+
+    def plan_exports(self):
+        """Work out which files are dirty and the (file, output path, page arguments) export for each one to write"""
+        libraries = self.page_libraries()
+        for file, needed in libraries.items():
+            self.manifest.set_libraries(file, needed)
+
+        changed = self.manifest.changed_files()
+        dirty = changed | self.manifest.dependents(changed)
+        # A page also changes when something it embeds starts or stops needing MathJax or Mermaid
+        dirty |= {file for file in libraries if self.manifest.libraries_changed(file)}
+        if self.manifest.assets_changed():
+            # Every page references the shared assets by name
+            dirty |= {file for file in self.files if file.endswith(('.md', '.canvas', '.base'))}
+        if self.prerender and (changed or self.manifest.removed_files()):
+            # A prerendered base view lists the properties of every file, so any change can alter it
+            dirty |= {file for file in self.files if file.endswith('.base')}
+        if self.prerender:
+            # Prerendered pages inline their embeds, so whatever embeds a dirty file, even indirectly, is dirty too
+            id_to_file = {unique_id: file for file, unique_id in self.file_ids.items()}
+            dirty_ids = {self.file_ids[file] for file in dirty if file in self.file_ids}
+            dirty |= {id_to_file[unique_id] for unique_id in self.link_graph.embedders(dirty_ids)}
+
+        exports = []
         for file in self.files:
+            if self.incremental and file not in dirty and self.manifest.outputs_exist(file):
+                self.manifest.carry_outputs(file)
+                continue
+
             offset = self.make_offset(file)
             parts = file.rsplit(".", 1)
             if len(parts) != 2:
                 continue
 
             file_path, extension = parts
-            file_name = os.path.basename(file_path)
-
+            file_name = file_path.replace('/', '\\').split('\\')[-1]
             relative_path = file[2:] if file.startswith('./') else file
-            relative_dir = str(Path(relative_path).parent) if Path(relative_path).parent != Path('.') else ""
-            
-            if extension in ("md", "canvas", "base"):
-                if self.link_to_filepath.get(file_name, file_name).endswith(extension):
-                    output_file_name = self.normalize(self.link_to_filepath.get(file_name, file_name)).rsplit('.', 1)[0] + f".{extension}.html"
-                elif extension in ("base", "canvas"):
-                    output_file_name = self.normalize(self.link_to_filepath.get(file_name, file_name)).rsplit('.', 1)[0] + f".{extension}.html"
-                else:
-                    output_file_name = self.normalize(self.link_to_filepath.get(file_name, file_name + '.html'))
-            else:
-                self.copy_non_markdown_file(file)
+
+            if extension not in ("md", "canvas", "base"):
+                exports.append((file, None, None))
                 continue
-            
-            if relative_dir:
-                transformed_dir = "/".join(self.normalize(part) for part in relative_dir.split("/"))
-                output_path = Path(self.out_directory) / transformed_dir / output_file_name.split("\\")[-1]
-            else:
-                output_path = Path(self.out_directory) / output_file_name
+            output_path = self.output_path(file)
+
+            current_file_identifier = relative_path
+            exports.append((file, output_path, dict(
+                title=file_name,
+                offset=offset,
+                data_current_file=current_file_identifier[2:],
+                type=extension,
+                libraries=libraries.get(file, [])
+            )))
 
+        return dirty, exports
+
+    def page_libraries(self):
+        """Map each note and canvas to the optional libraries (mathjax, mermaid) its content or its embeds need"""
+        own = {}
+        for unique_id, content in self.file_contents.items():
+            own[unique_id] = {name for name, found in (("mathjax", MATH_PATTERN.search(content)), ("mermaid", MERMAID_FENCE in content)) if found}
+
+        libraries = {}
+        for file in self.files:
+            if file.endswith(('.md', '.canvas')):
+                unique_id = self.file_ids[file]
+                needed = set(own.get(unique_id, ()))
+                for embedded_id in self.link_graph.embed_order(unique_id):
+                    needed |= own.get(embedded_id, set())
+                libraries[file] = sorted(needed)
+        return libraries
+
+    def script_url(self, offset, library):
+        """Where a page loads a browser library from: the export's vendor/ folder, or its CDN"""
+        return f"{offset}/vendor/{SCRIPTS[library]}" if self.vendor else CDN_SCRIPTS[library]
+
+    def prerender_pages(self, pages):
+        """Run renderer.js under Node for each page, returning (html, toc) or None where it failed"""
+        script = (Path(__file__).resolve().parent / "scripts/prerender.js").resolve()
+        command = ["node", str(script), self.out_directory] + ([self.marked_path] if self.marked_path else [])
+        jobs = [{"current": page["data_current_file"], "type": page["type"]} for page in pages]
+
+        # One Node process per worker, each taking every n-th page
+        chunks = [list(range(len(jobs)))[i::self.jobs] for i in range(min(self.jobs, len(jobs)))]
+
+        def run_chunk(indexes):
+            process = subprocess.run(command, input=json.dumps([jobs[i] for i in indexes]),
+                                     capture_output=True, text=True, encoding='utf-8')
+            if process.returncode != 0:
+                raise RuntimeError(process.stderr.strip())
+            return [json.loads(line) for line in process.stdout.splitlines() if line]
+
+        try:
+            chunk_results = self.map_jobs(run_chunk, chunks)
+        except (OSError, RuntimeError) as e:
+            print(f"Warning: Prerendering unavailable, pages will render in the browser: {e}")
+            return [None] * len(pages)
+
+        results = [None] * len(pages)
+        for indexes, chunk_result in zip(chunks, chunk_results):
+            for result in chunk_result:
+                results[indexes[result["index"]]] = result
+        for page, result in zip(pages, results):
+            if result and "error" in result:
+                print(f"Error prerendering {page['data_current_file']}: {result['error'].splitlines()[0]}")
+        return [(result["html"], result["toc"]) if result and "error" not in result else None for result in results]
+
+    def export_file(self, export):
+        """Write one page or copy one attachment, returning (output path, error message)"""
+        file, output_path, page = export
+        if page is None:
             try:
-                current_file_identifier = relative_path
-                
-                html_content = self.build_html_with_raw_markdown(
-                    title=file_name,
-                    offset=offset,
-                    data_current_file=current_file_identifier[2:],
-                    type=extension
-                )
+                return self.copy_non_markdown_file(file), None
+            except OSError as e:
+                return None, f"ERROR: {e}"
 
-                self.FileManager.writeToFile(output_path, html_content)
+        try:
+            html_content = self.build_html_with_raw_markdown(**page)
+            self.FileManager.writeToFile(output_path, html_content)
+            return output_path, None
+        except Exception as e:
+            return None, f"Error processing file {file}: {e}"
 
-            except Exception as e:
-                print(f"Error processing file {file}: {e}")
+    def output_path(self, file):
+        """Where file is exported to: its page for .md, .canvas and .base files, a copy of it for anything else"""
+        file_path, extension = file.rsplit(".", 1)
+        if extension not in ("md", "canvas", "base"):
+            if file.startswith(".\\") or file.startswith("./"):
+                relative_path = file[2:]
+            elif file.startswith("."):
+                relative_path = file[1:]
+            else:
+                relative_path = file
+            return Path(self.out_directory, *self.normalize(relative_path).replace('/', '\\').split('\\'))
 
-        print("Compiled")
-        self.FileManager.write_files(self.out_directory)
+        file_name = file_path.replace('/', '\\').split('\\')[-1]
+        relative_dir = "/".join(file[2:].replace('/', '\\').split('\\')[:-1])
+
+        if self.link_to_filepath.get(file_name, file_name).endswith(extension):
+            output_file_name = self.normalize(self.link_to_filepath.get(file_name, file_name)).rsplit('.', 1)[0] + f".{extension}.html"
+        elif extension in ("base", "canvas"):
+            output_file_name = self.normalize(self.link_to_filepath.get(file_name, file_name)).rsplit('.', 1)[0] + f".{extension}.html"
+        else:
+            output_file_name = self.normalize(self.link_to_filepath.get(file_name, file_name + '.html'))
+
+        if relative_dir:
+            transformed_dir = "/".join(self.normalize(part) for part in relative_dir.split("/"))
+            return Path(self.out_directory) / transformed_dir / output_file_name.split("\\")[-1]
+        return Path(self.out_directory) / output_file_name.split("\\")[-1]
+
+    def file_hrefs(self):
+        """file ID -> the file's export path relative to the output directory, for the pages' links"""
+        return {self.file_ids[file]: self.output_path(file).relative_to(self.out_directory).as_posix() for file in self.files}
 
     def copy_non_markdown_file(self, file):
-        """Copy non-markdown files to output directory"""
+        """Copy (or link) a non-markdown file to the output directory, skipping it when the output is up to date"""
         if file.startswith(".\\") or file.startswith("./"):
             relative_path = file[2:]
         elif file.startswith("."):
@@ -338,15 +748,11 @@ class ObsidianMarkdownToHtml:
         else:
             relative_path = file
 
-        source_file = Path(self.in_directory) / relative_path
-        export_file = Path(self.out_directory) / self.normalize(relative_path)
+        source_file = Path(self.source_path(relative_path))
+        export_file = self.output_path(file)
 
-        export_file.parent.mkdir(parents=True, exist_ok=True)
-
-        if source_file.exists():
-            shutil.copy(source_file, export_file)
-        else:
-            print(f"ERROR: Source file not found: {source_file}")
+        self.attachment_exporter.export(source_file, export_file)
+        return export_file
 
     def normalize(self, s):
         return s.replace(" ", "-").lower()
@@ -0,0 +1,177 @@
+"""Time exports of a synthetic vault and compare them against a saved baseline.
+
+    python benchmarks/run_benchmark.py --notes 2000 --repeat 3 --save baseline.json
+    python benchmarks/run_benchmark.py --notes 2000 --repeat 3 --baseline baseline.json
+
+Every export runs in a fresh subprocess so that peak RSS belongs to that export alone. Phase
+timings and counters are taken from the export's own profile report (see --profile).
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from synthetic_vault import add_arguments, generate_vault, DEFAULTS
+
+def output_bytes(out_directory):
+    sizes = {"html": 0, "renderer": 0, "other": 0}
+    for root, _, files in os.walk(out_directory):
+        for name in files:
+            size = os.path.getsize(os.path.join(root, name))
+            if name.endswith(".html"):
+                sizes["html"] += size
+            elif name == "renderer.js":
+                sizes["renderer"] += size
+            else:
+                sizes["other"] += size
+    sizes["total"] = sum(sizes.values())
+    return sizes
+
+def peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def measure(in_directory, out_directory, options):
+    """Run one export in this process, returning the profiler's phase timings and counters, peak RSS and output sizes"""
+    from ObsidianMarkdownToHtml import ObsidianMarkdownToHtml
+
+    # The report goes beside the output so it doesn't count towards the output sizes
+    report_path = out_directory.rstrip(os.sep) + ".profile.json"
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        ObsidianMarkdownToHtml(in_directory, out_directory, profile=report_path, **options).compile_webpages()
+    total = time.perf_counter() - started
+
+    with open(report_path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    os.unlink(report_path)
+    return {"phases": {name: phase["seconds"] for name, phase in report["phases"].items()},
+            "counters": report["counters"], "total": total, "peak_rss_bytes": peak_rss_bytes(),
+            "output_bytes": output_bytes(out_directory)}
+
+def run_export(in_directory, out_directory, options):
+    result = subprocess.run([sys.executable, __file__, "--measure", in_directory, out_directory, json.dumps(options)],
+                            check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def summarize(runs):
+    """Median of every metric across runs"""
+    def median(key_path):
+        values = []
+        for run in runs:
+            value = run
+            for key in key_path:
+                value = value[key]
+            values.append(value)
+        return statistics.median(values) if None not in values else None
+
+    # A phase or counter missing from a run (say, nothing was skipped) counts as zero there
+    for run in runs:
+        for section in ("phases", "counters"):
+            for name in {name for other in runs for name in other[section]}:
+                run[section].setdefault(name, 0)
+
+    return {
+        "phases": {phase: median(("phases", phase)) for phase in runs[0]["phases"]},
+        "counters": {name: median(("counters", name)) for name in sorted(runs[0]["counters"])},
+        "total": median(("total",)),
+        "peak_rss_bytes": median(("peak_rss_bytes",)),
+        "output_bytes": {kind: median(("output_bytes", kind)) for kind in runs[0]["output_bytes"]},
+    }
+
+def flatten(summary):
+    metrics = {f"{phase} (s)": seconds for phase, seconds in summary["phases"].items()}
+    metrics["total (s)"] = summary["total"]
+    for name, value in summary.get("counters", {}).items():
+        metrics[name] = value
+    metrics["peak RSS (MB)"] = summary["peak_rss_bytes"] / 2 ** 20 if summary["peak_rss_bytes"] else None
+    for kind, size in summary["output_bytes"].items():
+        metrics[f"output {kind} (KB)"] = size / 1024
+    return metrics
+
+def print_report(results, baseline=None):
+    for scenario, summary in results["scenarios"].items():
+        print(f"\n{scenario:<30}{'current':>12}" + (f"{'baseline':>12}  {'change':>8}" if baseline else ""))
+        current = flatten(summary)
+        previous = flatten(baseline["scenarios"][scenario]) if baseline and scenario in baseline["scenarios"] else {}
+        for metric, value in current.items():
+            line = f"  {metric:<28}{value:>12.3f}" if value is not None else f"  {metric:<28}{'n/a':>12}"
+            old = previous.get(metric)
+            if old:
+                line += f"{old:>12.3f}  {(value - old) / old * 100:+7.1f}%"
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exports of a synthetic vault")
+    add_arguments(parser)
+    parser.add_argument("--vault", help="benchmark this vault instead of generating one")
+    parser.add_argument("--repeat", type=int, default=3, help="exports per scenario; medians are reported")
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--shard-contents", action="store_true")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="also time an incremental export over an unchanged previous export")
+    parser.add_argument("--save", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against results saved with --save")
+    args = parser.parse_args()
+
+    options = {"jobs": args.jobs, "shard_contents": args.shard_contents, "build_date": False}
+    vault_params = {name: getattr(args, name) for name in DEFAULTS}
+
+    with tempfile.TemporaryDirectory(prefix="omth-bench-") as work:
+        if args.vault:
+            in_directory = os.path.abspath(args.vault)
+            vault_params = {"path": in_directory}
+        else:
+            in_directory = os.path.join(work, "vault")
+            generate_vault(in_directory, **vault_params)
+        out_directory = os.path.join(work, "out")
+
+        scenarios = {"full": [], "rebuild": []} if args.rebuild else {"full": []}
+        for _ in range(args.repeat):
+            shutil.rmtree(out_directory, ignore_errors=True)
+            scenarios["full"].append(run_export(in_directory, out_directory, dict(options, incremental=True)))
+            if args.rebuild:
+                scenarios["rebuild"].append(run_export(in_directory, out_directory, dict(options, incremental=True)))
+
+    results = {
+        "vault": vault_params,
+        "options": options,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scenarios": {name: summarize(runs) for name, runs in scenarios.items()},
+        "runs": scenarios,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("vault") != results["vault"] or baseline.get("options") != results["options"]:
+            print("Warning: baseline was recorded with a different vault or options")
+    print_report(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--measure":
+        print(json.dumps(measure(sys.argv[2], sys.argv[3], json.loads(sys.argv[4]))))
+    else:
+        main()
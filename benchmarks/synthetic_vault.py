@@ -0,0 +1,133 @@
+"""Reproducible synthetic Obsidian vaults for benchmarking exports.
+
+    python benchmarks/synthetic_vault.py <out_vault> --notes 2000 --depth 3 --seed 1
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore "
+         "et dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi aliquip "
+         "ex ea commodo consequat duis aute irure in reprehenderit voluptate velit esse cillum fugiat").split()
+
+DEFAULTS = dict(notes=500, depth=2, folders_per_level=3, note_size=2000, attachments=50, attachment_size=20000,
+                canvases=5, bases=3, links=5, embeds=1, duplicate_basenames=0.05, seed=0)
+
+def folder_tree(depth, folders_per_level):
+    """Every folder path (as a tuple of parts) down to depth, the vault root included"""
+    folders = [()]
+    level = [()]
+    for d in range(depth):
+        level = [parent + (f"Folder {d + 1}-{i + 1}",) for parent in level for i in range(folders_per_level)]
+        folders.extend(level)
+    return folders
+
+def paragraph(rng, size):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+def generate_vault(path, notes=DEFAULTS["notes"], depth=DEFAULTS["depth"], folders_per_level=DEFAULTS["folders_per_level"],
+                   note_size=DEFAULTS["note_size"], attachments=DEFAULTS["attachments"],
+                   attachment_size=DEFAULTS["attachment_size"], canvases=DEFAULTS["canvases"], bases=DEFAULTS["bases"],
+                   links=DEFAULTS["links"], embeds=DEFAULTS["embeds"], duplicate_basenames=DEFAULTS["duplicate_basenames"],
+                   seed=DEFAULTS["seed"]):
+    """Write a vault to path (replacing it) and return the parameters it was generated with.
+
+    The same parameters and seed always produce byte-identical vaults. links and embeds are
+    per-note counts; duplicate_basenames is the fraction of notes that reuse another note's
+    name in a different folder.
+    """
+    params = dict(notes=notes, depth=depth, folders_per_level=folders_per_level, note_size=note_size,
+                  attachments=attachments, attachment_size=attachment_size, canvases=canvases, bases=bases,
+                  links=links, embeds=embeds, duplicate_basenames=duplicate_basenames, seed=seed)
+    rng = random.Random(seed)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    folders = folder_tree(depth, folders_per_level)
+    for folder in folders:
+        os.makedirs(os.path.join(path, *folder), exist_ok=True)
+
+    duplicates = int(notes * duplicate_basenames)
+    note_names = [f"Note {i}" for i in range(notes - duplicates)]
+    note_names += [rng.choice(note_names) if note_names else "Note 0" for _ in range(duplicates)]
+    # A duplicate only makes sense in another folder; one with no free folder left keeps a unique name
+    note_folders = []
+    placed = set()
+    for i, name in enumerate(note_names):
+        for attempt in range(len(folders)):
+            folder = folders[(i + attempt) % len(folders)]
+            if (folder, name) not in placed:
+                break
+        else:
+            folder = folders[i % len(folders)]
+            name = note_names[i] = f"Note {i}"
+        note_folders.append(folder)
+        placed.add((folder, name))
+
+    attachment_names = [f"attachment {i}.png" for i in range(attachments)]
+    for i, name in enumerate(attachment_names):
+        with open(os.path.join(path, *folders[i % len(folders)], name), "wb") as f:
+            f.write(rng.randbytes(attachment_size))
+
+    sections = max(1, note_size // 500)
+    for folder, name in zip(note_folders, note_names):
+        lines = ["---", f'status: "{rng.choice(["draft", "review", "done"])}"', f'rating: "{rng.randint(1, 5)}"', "---",
+                 f"# {name}"]
+        for s in range(sections):
+            lines.append(f"## Section {s + 1}")
+            lines.append(paragraph(rng, note_size // sections))
+        for _ in range(links if note_names else 0):
+            lines.append(f"See [[{rng.choice(note_names)}]].")
+        for _ in range(embeds if note_names else 0):
+            lines.append(f"![[{rng.choice(note_names)}#Section 1]]")
+        if attachment_names and rng.random() < 0.2:
+            lines.append(f"![[{rng.choice(attachment_names)}]]")
+        with open(os.path.join(path, *folder, f"{name}.md"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    for i in range(canvases):
+        nodes = [{"id": f"n{n}", "type": "text", "text": f"{paragraph(rng, 80)} [[{rng.choice(note_names)}]]",
+                  "x": (n % 5) * 300, "y": (n // 5) * 200, "width": 250, "height": 150} for n in range(20)]
+        edges = [{"id": f"e{n}", "fromNode": f"n{n}", "toNode": f"n{n + 1}"} for n in range(19)]
+        with open(os.path.join(path, *folders[i % len(folders)], f"Canvas {i}.canvas"), "w", encoding="utf-8") as f:
+            json.dump({"nodes": nodes, "edges": edges}, f)
+
+    for i in range(bases):
+        base = "\n".join([
+            "filters:",
+            "  and:",
+            '    - file.ext == "md"',
+            "views:",
+            "  - type: table",
+            "    name: All",
+            "    order: [file.name, status, rating]",
+            "    sort:",
+            "      - property: file.name",
+            "        direction: ASC",
+        ])
+        with open(os.path.join(path, *folders[i % len(folders)], f"Base {i}.base"), "w", encoding="utf-8") as f:
+            f.write(base + "\n")
+
+    return params
+
+def add_arguments(parser):
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Obsidian vault")
+    parser.add_argument("path")
+    add_arguments(parser)
+    args = vars(parser.parse_args())
+    print(json.dumps(generate_vault(args.pop("path"), **args)))
+
+if __name__ == "__main__":
+    main()
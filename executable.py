@@ -1,9 +1,76 @@
-import sys
+import argparse
 from ObsidianMarkdownToHtml import *
+from python_segments.Watcher import Watcher
+from python_segments.Vendor import Vendor
 
-in_directory = sys.argv[1]
-out_directory = sys.argv[2]
+parser = argparse.ArgumentParser(description="Export an Obsidian vault to HTML")
+parser.add_argument("in_directory")
+parser.add_argument("out_directory")
+parser.add_argument("--shard-contents", action="store_true",
+                    help="write note contents to per-note JSON shards fetched on demand instead of inlining them in renderer.js")
+parser.add_argument("--incremental", action="store_true",
+                    help="only rewrite pages and attachments whose sources (or link targets) changed since the last export")
+parser.add_argument("--build-date",
+                    help="pin the 'Last updated' footer text instead of using today's date")
+parser.add_argument("--no-build-date", action="store_true",
+                    help="omit the 'Last updated' footer so repeated exports are byte-identical")
+parser.add_argument("--jobs", "-j", type=int, default=1,
+                    help="number of worker threads for reading, page writing and copying (0 = one per CPU); "
+                         "this overlaps file I/O, while YAML and regex parsing still run one at a time")
+parser.add_argument("--ignore", action="append", default=[], metavar="PATTERN",
+                    help="skip vault files/folders matching this glob (repeatable; see also .omthignore)")
+parser.add_argument("--scan-snapshot", action="store_true",
+                    help="persist a directory snapshot so unchanged folders are not re-listed on the next export")
+parser.add_argument("--prerender", action="store_true",
+                    help="render pages at build time with Node instead of in the browser")
+parser.add_argument("--marked", metavar="PATH",
+                    help="marked.min.js to prerender with (defaults to require('marked'))")
+parser.add_argument("--profile", nargs="?", const=True, default=False, metavar="PATH",
+                    help="write a JSON report of phase timings, counters and the slowest files (default: <out>/.omth-profile.json)")
+parser.add_argument("--cprofile", metavar="PATH",
+                    help="also dump cProfile stats of the export to PATH")
+parser.add_argument("--attachments", choices=("copy", "hardlink", "reflink", "symlink"), default="copy",
+                    help="how attachments get into the export; link modes fall back to copying when the filesystem can't")
+parser.add_argument("--attachment-check", choices=("stat", "hash", "always"), default="stat",
+                    help="skip attachments whose output matches by size and mtime (stat), by content (hash), or never (always)")
+parser.add_argument("--fingerprint", action="store_true",
+                    help="reference shared scripts and styles by content-hashed names so they can be cached indefinitely")
+parser.add_argument("--compress", nargs="?", type=int, choices=range(1, 10), const=9, default=None, metavar="LEVEL",
+                    help="write .gz (and .br, with the brotli package) siblings of text outputs at LEVEL 1-9 (default 9)")
+parser.add_argument("--vendor", metavar="DIR",
+                    help="load marked, MathJax, lucide and Mermaid from pinned copies in DIR (bundled into the export) instead of CDNs")
+parser.add_argument("--fetch-vendor", action="store_true",
+                    help="download the pinned libraries into the --vendor DIR before exporting")
+parser.add_argument("--watch", action="store_true",
+                    help="keep running and re-export incrementally whenever the vault changes")
+parser.add_argument("--serve", action="store_true",
+                    help="with --watch, serve the export over HTTP and reload open pages after each rebuild")
+parser.add_argument("--port", type=int, default=8000,
+                    help="port for --serve (default 8000)")
+args = parser.parse_args()
 
-om2html = ObsidianMarkdownToHtml(in_directory, out_directory)
+if args.fetch_vendor:
+    if not args.vendor:
+        parser.error("--fetch-vendor needs --vendor DIR")
+    Vendor(args.vendor).fetch()
 
-om2html.compile_webpages()
+# Parsed sources survive between watch rebuilds so only changed files are read again
+ingest_cache = {} if args.watch else None
+
+def export(incremental):
+    om2html = ObsidianMarkdownToHtml(args.in_directory, args.out_directory,
+                                     shard_contents=args.shard_contents, incremental=incremental,
+                                     build_date=False if args.no_build_date else args.build_date,
+                                     jobs=args.jobs, ignore_patterns=args.ignore, scan_snapshot=args.scan_snapshot,
+                                     prerender=args.prerender, marked_path=args.marked, ingest_cache=ingest_cache,
+                                     profile=args.profile, cprofile_path=args.cprofile,
+                                     attachment_mode=args.attachments, attachment_check=args.attachment_check,
+                                     fingerprint_assets=args.fingerprint, compress=args.compress,
+                                     vendor_directory=args.vendor)
+    om2html.compile_webpages()
+
+export(args.incremental)
+
+if args.watch:
+    Watcher(args.in_directory, args.out_directory, lambda: export(True), ignore_patterns=args.ignore,
+            port=args.port if args.serve else None).run()
@@ -0,0 +1,174 @@
+import errno
+import hashlib
+import os
+import shutil
+import stat
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+MODES = ("copy", "hardlink", "reflink", "symlink")
+CHECKS = ("stat", "hash", "always")
+FICLONE = 0x40049409  # Linux ioctl that shares a file's extents (btrfs, XFS, bcachefs, ...)
+LARGE_FILE = 64 * 2 ** 20
+CHUNK_SIZE = 16 * 2 ** 20
+
+class AttachmentExporter:
+    """Puts vault attachments into the export, doing as little I/O as it can.
+
+    An attachment is skipped when the output already matches it: same size and mtime ('stat'),
+    same content ('hash'), or never ('always'). Otherwise it is hardlinked, reflinked or
+    symlinked when asked to and the filesystem allows it, and copied in the kernel with
+    copy_file_range (large files in parallel chunks) when not. Outputs are written to a temporary
+    name and renamed into place, so an interrupted export never leaves a half-written file.
+    """
+
+    def __init__(self, mode="copy", check="stat", jobs=1, profiler=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown attachment mode: {mode}")
+        if check not in CHECKS:
+            raise ValueError(f"Unknown attachment check: {check}")
+        self.mode = mode
+        self.check = check
+        self.jobs = jobs
+        self.profiler = profiler
+        # Set once a link mode fails across devices or is unsupported, so later files go straight to copying
+        self.link_unavailable = False
+        self.chunk_pool = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+    def close(self):
+        if self.chunk_pool is not None:
+            self.chunk_pool.shutdown()
+
+    def count(self, action):
+        if self.profiler is not None:
+            self.profiler.count(f"attachments_{action}")
+
+    def export(self, source, destination):
+        """Bring destination up to date with source, returning 'skipped', 'linked' or 'copied'"""
+        try:
+            source_stat = os.stat(source)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Source file not found: {source}") from None
+        try:
+            destination_stat = os.lstat(destination)
+        except FileNotFoundError:
+            destination_stat = None
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+
+        if destination_stat is not None and self.is_unchanged(source, source_stat, destination, destination_stat):
+            action = "skipped"
+        elif self.mode != "copy" and not self.link_unavailable and self.link(source, destination):
+            action = "linked"
+        else:
+            self.copy(source, source_stat, destination)
+            action = "copied"
+            if self.profiler is not None:
+                self.profiler.record_written(source_stat.st_size)
+        self.count(action)
+        return action
+
+    def is_unchanged(self, source, source_stat, destination, destination_stat):
+        if self.check == "always":
+            return False
+        if self.mode == "symlink":
+            return stat.S_ISLNK(destination_stat.st_mode) and os.readlink(destination) == os.path.abspath(source)
+        if not stat.S_ISREG(destination_stat.st_mode):
+            return False
+        same_file = (destination_stat.st_dev, destination_stat.st_ino) == (source_stat.st_dev, source_stat.st_ino)
+        if self.mode == "hardlink" and not self.link_unavailable:
+            return same_file
+        if same_file:
+            # A hardlink left by an earlier export; replace it with a real copy
+            return False
+        if destination_stat.st_size != source_stat.st_size:
+            return False
+        if self.check == "stat":
+            return destination_stat.st_mtime_ns == source_stat.st_mtime_ns
+        return self.file_hash(source) == self.file_hash(destination)
+
+    @staticmethod
+    def file_hash(path):
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(2 ** 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def temporary_path(destination):
+        return f"{destination}.omth-tmp-{os.getpid()}-{id(destination)}"
+
+    def link(self, source, destination):
+        """Hardlink, reflink or symlink source into place; False if this filesystem can't"""
+        temporary = self.temporary_path(destination)
+        try:
+            if self.mode == "hardlink":
+                os.link(source, temporary)
+            elif self.mode == "symlink":
+                os.symlink(os.path.abspath(source), temporary)
+            else:
+                self.reflink(source, temporary)
+            os.replace(temporary, destination)
+            return True
+        except OSError as e:
+            if os.path.lexists(temporary):
+                os.unlink(temporary)
+            if e.errno in (errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS):
+                if not self.link_unavailable:
+                    print(f"Warning: Can't {self.mode} attachments into the output directory ({e.strerror}); copying instead")
+                self.link_unavailable = True
+                return False
+            raise
+
+    @staticmethod
+    def reflink(source, destination):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.EOPNOTSUPP, "reflinks are only supported on Linux")
+        import fcntl
+        with open(source, "rb") as f_in, open(destination, "wb") as f_out:
+            fcntl.ioctl(f_out.fileno(), FICLONE, f_in.fileno())
+
+    def copy(self, source, source_stat, destination):
+        temporary = self.temporary_path(destination)
+        try:
+            with open(source, "rb") as f_in, open(temporary, "wb") as f_out:
+                if not self.copy_in_kernel(f_in.fileno(), f_out.fileno(), source_stat.st_size):
+                    f_in.seek(0)
+                    f_out.seek(0)
+                    f_out.truncate()
+                    shutil.copyfileobj(f_in, f_out, 2 ** 20)
+            # Keep the source mtime so the 'stat' check recognises this output next time
+            os.utime(temporary, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+            os.replace(temporary, destination)
+        except BaseException:
+            if os.path.lexists(temporary):
+                os.unlink(temporary)
+            raise
+
+    def copy_in_kernel(self, source_fd, destination_fd, size):
+        """copy_file_range the whole file, in parallel chunks when it is large; False if unsupported"""
+        if not hasattr(os, "copy_file_range"):
+            return False
+        chunks = [(offset, min(CHUNK_SIZE, size - offset)) for offset in range(0, size, CHUNK_SIZE)]
+
+        def copy_chunk(chunk):
+            offset, length = chunk
+            while length > 0:
+                copied = os.copy_file_range(source_fd, destination_fd, length, offset, offset)
+                if copied == 0:
+                    raise OSError(errno.EIO, "copy_file_range stopped before the end of the file")
+                offset += copied
+                length -= copied
+
+        try:
+            if self.chunk_pool is not None and size >= LARGE_FILE:
+                os.ftruncate(destination_fd, size)
+                list(self.chunk_pool.map(copy_chunk, chunks))
+            else:
+                for chunk in chunks:
+                    copy_chunk(chunk)
+            return True
+        except OSError as e:
+            if e.errno in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.EIO):
+                return False
+            raise
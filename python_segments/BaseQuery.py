@@ -0,0 +1,213 @@
+import re
+import unicodedata
+from functools import cmp_to_key
+
+STARTS_WITH = re.compile(r'^(.+)\.startsWith\(["\'](.+)["\']\)$')
+ENDS_WITH = re.compile(r'^(.+)\.endsWith\(["\'](.+)["\']\)$')
+HAS_PROPERTY = re.compile(r'^(.+)\.hasProperty\(["\'](.+)["\']\)$')
+JS_FLOAT = re.compile(r'^\s*[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+
+def compile_filter(node):
+    """Compile a .base filter (a string, or an and/or/not mapping of filters) into a predicate tuple.
+
+    String forms follow processFilters in renderer.js: x.startsWith("v"), x.endsWith("v"),
+    x.hasProperty("v"), a == "v" and a != "v"; anything else matches every file.
+    """
+    if isinstance(node, dict):
+        clauses = []
+        for op in ("and", "or", "not"):
+            if op in node:
+                clauses.append((op, [compile_filter(child) for child in node[op] or []]))
+        return clauses[0] if len(clauses) == 1 else ("and", clauses)
+
+    expression = str(node).strip()
+    if '.startsWith(' in expression:
+        match = STARTS_WITH.match(expression)
+        return ("startsWith", match.group(1), match.group(2)) if match else ("none",)
+    if '.endsWith(' in expression:
+        match = ENDS_WITH.match(expression)
+        return ("endsWith", match.group(1), match.group(2)) if match else ("none",)
+    if '.hasProperty(' in expression:
+        match = HAS_PROPERTY.match(expression)
+        return ("hasProperty", match.group(2)) if match else ("none",)
+    for operator, op in ((' == ', "eq"), (' != ', "ne")):
+        if operator in expression:
+            left, right = expression.split(operator, 1)
+            return (op, left.strip(), re.sub(r'^["\']|["\']$', '', right.strip()))
+    return ("all",)
+
+class PropertyIndex:
+    """Inverted indexes over file_properties, built lazily per property and shared by every base in a build.
+
+    Keys are 'file.<field>' for the path/file/folder/ext fields and the property name for
+    frontmatter; list-valued properties index each item.
+    """
+
+    def __init__(self, file_properties):
+        self.file_properties = file_properties
+        self.all_ids = frozenset(file_properties)
+        self.indexes = {}
+        self.present = {}
+
+    @staticmethod
+    def property_key(name):
+        return name[5:] if name.startswith('note.') else name
+
+    def raw_values(self, key):
+        for file_id, props in self.file_properties.items():
+            if key.startswith('file.'):
+                yield file_id, props.get(key[5:])
+            else:
+                yield file_id, (props.get("notes") or {}).get(key)
+
+    def index(self, key):
+        """value -> IDs of the files whose property (or one of its list items) equals it"""
+        if key not in self.indexes:
+            index = {}
+            for file_id, value in self.raw_values(key):
+                for item in value if isinstance(value, list) else [value]:
+                    if item is not None:
+                        index.setdefault(item, set()).add(file_id)
+            self.indexes[key] = index
+        return self.indexes[key]
+
+    def having(self, name):
+        """IDs of the files whose frontmatter has a non-empty value for name"""
+        if name not in self.present:
+            self.present[name] = {file_id for file_id, value in self.raw_values(name) if value not in (None, "")}
+        return self.present[name]
+
+    def matching(self, predicate):
+        op = predicate[0]
+        if op == "all":
+            return set(self.all_ids)
+        if op == "none":
+            return set()
+        if op == "and":
+            result = set(self.all_ids)
+            for child in predicate[1]:
+                result &= self.matching(child)
+            return result
+        if op == "or":
+            result = set()
+            for child in predicate[1]:
+                result |= self.matching(child)
+            return result
+        if op == "not":
+            result = set(self.all_ids)
+            for child in predicate[1]:
+                result -= self.matching(child)
+            return result
+        if op in ("startsWith", "endsWith"):
+            if predicate[1] not in ("file.folder", "file.path"):
+                return set()
+            # Test each distinct folder/path once rather than every file
+            test = str.startswith if op == "startsWith" else str.endswith
+            result = set()
+            for value, file_ids in self.index(predicate[1]).items():
+                if isinstance(value, str) and test(value, predicate[2]):
+                    result |= file_ids
+            return result
+        if op == "hasProperty":
+            return set(self.having(predicate[1]))
+        if op == "eq":
+            return set(self.index(self.property_key(predicate[1])).get(predicate[2], ()))
+        if op == "ne":
+            return self.all_ids - self.index(self.property_key(predicate[1])).get(predicate[2], set())
+        return set(self.all_ids)
+
+class BaseQuery:
+    """Evaluates the views of .base files at build time into ordered lists of row links"""
+
+    def __init__(self, file_properties, link_resolver):
+        self.file_properties = file_properties
+        self.link_resolver = link_resolver
+        self.index = PropertyIndex(file_properties)
+        self.links = self.all_links()
+
+    def all_links(self):
+        """(link, file ID) for every file, named and de-duplicated the way processBase does it"""
+        links, seen = [], set()
+        for props in self.file_properties.values():
+            name = props["file"]
+            if props["ext"].lower() in ("md", "canvas", "base"):
+                name = name.rsplit('.', 1)[0] if '.' in name else name
+            if name not in seen:
+                seen.add(name)
+                links.append((name, self.link_resolver.resolve(name)))
+        return links
+
+    def sort_value(self, file_id, prop):
+        """The value sortLinks compares, as getSortValue in renderer.js computes it"""
+        props = self.file_properties.get(file_id)
+        if not props:
+            return ''
+        if prop.startswith('file.'):
+            field = prop[5:]
+            if field in ('basename', 'name'):
+                return props["file"].rsplit('.', 1)[0] if '.' in props["file"] else props["file"]
+            return props.get(field) or ''
+        value = (props.get("notes") or {}).get(PropertyIndex.property_key(prop))
+        if isinstance(value, list):
+            return ', '.join(value)
+        if isinstance(value, str) and len(value) > 1 and value.startswith('"') and value.endswith('"'):
+            return value[1:-1]
+        return value or ''
+
+    @staticmethod
+    def collation_key(text):
+        """Sort key approximating localeCompare: letters compare without their accents, spaces and
+        punctuation before digits before letters; accents and then code points only break ties"""
+        decomposed = unicodedata.normalize("NFKD", text)
+        base = "".join(c for c in decomposed if not unicodedata.combining(c))
+        primary = tuple((0 if unicodedata.category(c)[0] in "ZPS" else 1 if unicodedata.category(c)[0] == "N" else 2, c)
+                        for c in base)
+        return primary, decomposed, text
+
+    @staticmethod
+    def js_float(value):
+        match = JS_FLOAT.match(str(value))
+        return float(match.group(0)) if match else None
+
+    def sort(self, rows, rules):
+        """Stable sort of (link, file ID) rows with the comparison sortLinks uses"""
+        properties = [rule.get("property", '') for rule in rules]
+        values = {}
+        for _, file_id in rows:
+            if file_id not in values:
+                text = [self.sort_value(file_id, prop) for prop in properties]
+                values[file_id] = [(value, self.js_float(value), self.collation_key(str(value).lower())) for value in text]
+
+        def compare(a, b):
+            for position, rule in enumerate(rules):
+                ascending = rule.get("direction") == 'ASC'
+                a_value, a_number, a_text = values[a[1]][position]
+                b_value, b_number, b_text = values[b[1]][position]
+                if a_value == '' and b_value == '':
+                    continue
+                if a_value == '':
+                    return 1 if ascending else -1
+                if b_value == '':
+                    return -1 if ascending else 1
+
+                if a_number is not None and b_number is not None:
+                    comparison = (a_number > b_number) - (a_number < b_number)
+                else:
+                    comparison = (a_text > b_text) - (a_text < b_text)
+                if comparison:
+                    return comparison if ascending else -comparison
+            return 0
+        return sorted(rows, key=cmp_to_key(compare))
+
+    def evaluate(self, base):
+        """Row links for each view of a parsed .base file, filtered and sorted"""
+        base_matches = self.index.matching(compile_filter(base["filters"])) if base.get("filters") else None
+        results = []
+        for view in base.get("views") or []:
+            matches = base_matches
+            if view.get("filters"):
+                view_matches = self.index.matching(compile_filter(view["filters"]))
+                matches = view_matches if matches is None else matches & view_matches
+            rows = [row for row in self.links if matches is None or row[1] in matches]
+            results.append([link for link, _ in self.sort(rows, view.get("sort") or [])])
+        return results
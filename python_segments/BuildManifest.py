@@ -0,0 +1,136 @@
+import json
+import os
+import hashlib
+from pathlib import Path
+
+MANIFEST_NAME = ".omth-manifest.json"
+MANIFEST_VERSION = 1
+
+class BuildManifest:
+    """Persistent record of the previous export, stored in the output directory.
+
+    Each source file (keyed the same way as FileManager's file list) maps to its mtime,
+    size, content hash, the outputs it produced and the links/embeds it depends on.
+    Attachments are tracked by mtime and size only, so they never have to be hashed.
+    """
+
+    def __init__(self, out_directory, fingerprint):
+        self.path = Path(out_directory) / MANIFEST_NAME
+        self.fingerprint = fingerprint
+        self.previous = {}
+        self.sources = {}
+        self.previous_assets = {}
+        self.assets = {}
+
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION and data.get("fingerprint") == fingerprint:
+                    self.previous = data.get("sources", {})
+                    self.previous_assets = data.get("assets", {})
+            except (OSError, ValueError) as e:
+                print(f"Warning: Ignoring unreadable build manifest {self.path}: {e}")
+
+    @staticmethod
+    def hash_text(text):
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def stat(full_path):
+        st = os.stat(full_path)
+        return st.st_mtime_ns, st.st_size
+
+    def record(self, file, mtime, size, content_hash=None, deps=None):
+        entry = self.sources.setdefault(file, {})
+        entry["mtime"] = mtime
+        entry["size"] = size
+        entry["hash"] = content_hash
+        entry["deps"] = deps or {}
+        entry.setdefault("outputs", [])
+
+    def set_deps(self, file, deps):
+        self.sources.setdefault(file, {})["deps"] = deps
+
+    def add_output(self, file, output_path):
+        rel_output = os.path.relpath(output_path, self.path.parent).replace(os.sep, "/")
+        outputs = self.sources.setdefault(file, {}).setdefault("outputs", [])
+        if rel_output not in outputs:
+            outputs.append(rel_output)
+
+    def carry_outputs(self, file):
+        """Keep the outputs of a file that was skipped because it is unchanged"""
+        for rel_output in self.previous.get(file, {}).get("outputs", []):
+            self.add_output(file, self.path.parent / rel_output)
+
+    def is_changed(self, file):
+        """Whether a source differs from the previous build (new files count as changed)"""
+        old = self.previous.get(file)
+        new = self.sources.get(file)
+        if old is None or new is None:
+            return True
+        if new.get("hash") is not None and old.get("hash") is not None:
+            return new["hash"] != old["hash"]
+        return new.get("mtime") != old.get("mtime") or new.get("size") != old.get("size")
+
+    def changed_files(self):
+        return {file for file in self.sources if self.is_changed(file)}
+
+    def removed_files(self):
+        return set(self.previous) - set(self.sources)
+
+    def dependents(self, changed):
+        """Files whose link/embed targets changed, appeared, vanished or now resolve elsewhere"""
+        changed_paths = {self.relative_source(file) for file in changed | self.removed_files()}
+        result = set()
+        for file, entry in self.sources.items():
+            old_deps = self.previous.get(file, {}).get("deps", {})
+            for name, resolved in entry.get("deps", {}).items():
+                if resolved in changed_paths or old_deps.get(name, resolved) != resolved:
+                    result.add(file)
+                    break
+        return result
+
+    def set_libraries(self, file, libraries):
+        self.sources.setdefault(file, {})["libraries"] = libraries
+
+    def libraries_changed(self, file):
+        """Whether a page needs different optional libraries than in the previous build"""
+        return self.previous.get(file, {}).get("libraries", []) != self.sources.get(file, {}).get("libraries", [])
+
+    def set_assets(self, assets):
+        """Record the (possibly fingerprinted) asset names pages were written against"""
+        self.assets = dict(assets)
+
+    def assets_changed(self):
+        return self.assets != self.previous_assets
+
+    def outputs_exist(self, file):
+        outputs = self.previous.get(file, {}).get("outputs", [])
+        return bool(outputs) and all((self.path.parent / rel_output).exists() for rel_output in outputs)
+
+    def remove_stale_outputs(self):
+        """Delete outputs whose source file no longer exists in the vault"""
+        live_outputs = {rel_output for entry in self.sources.values() for rel_output in entry.get("outputs", [])}
+        for file in self.removed_files():
+            for rel_output in self.previous[file].get("outputs", []):
+                output_path = self.path.parent / rel_output
+                if rel_output not in live_outputs and output_path.exists():
+                    output_path.unlink()
+                    print(f"Removed stale output: {rel_output}")
+
+    @staticmethod
+    def relative_source(file):
+        if file.startswith('.\\') or file.startswith('./'):
+            return file[2:]
+        return file
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "fingerprint": self.fingerprint,
+                "sources": self.sources,
+                "assets": self.assets,
+            }, f)
@@ -1,11 +1,11 @@
-from collections import deque
-from os import listdir, makedirs
-from os.path import isfile, isdir, dirname
+from os import makedirs
+from os.path import dirname
 from pathlib import Path
+from python_segments.VaultScanner import VaultScanner, SNAPSHOT_NAME
 base_dir = Path(__file__).resolve().parent
 
 class FileManager:
-    def __init__(self, in_directory, out_directory):
+    def __init__(self, in_directory, out_directory, ignore_patterns=None, scan_snapshot=False):
         self.files = [
             ("styles/omth.css", "style.css"),
             ("styles/json_canvas.css", "canvas.css"),
@@ -14,83 +14,48 @@ class FileManager:
         ]
         self.in_directory = in_directory
         self.out_directory = out_directory
+        self.scanner = VaultScanner(
+            in_directory,
+            ignore_patterns=ignore_patterns,
+            snapshot_path=Path(out_directory) / SNAPSHOT_NAME if scan_snapshot else None
+        )
 
     def add_dirs_to_dict(self):
         files = []
         link_to_filepath = {}
         basename_tracker = {}  # Track basename conflicts
-        stack = deque([""])
-        
-        while stack:
-            path = stack.popleft()
-            nu_dir = self.in_directory + "\\" + path
-            files_and_dirs = listdir(nu_dir)
-            sep_files = [f for f in files_and_dirs if (isfile(nu_dir+'/'+f) and f[0] != '~')]
-            dirs = [f for f in files_and_dirs if (isdir(nu_dir+'/'+f) and f[0] != '.' and f[0] != '~')]
+        self.file_stats = {}
+
+        for dir_parts, file, mtime, size in self.scanner.scan():
+            path = "".join("\\" + part for part in dir_parts)
+            file_key = ".\\" + "\\".join(dir_parts + (file,))
+            files.append(file_key)
+            if mtime is not None:
+                self.file_stats[file_key] = (mtime, size)
+
+            nu_rel_dir = "." + path + "\\"
+            extension = file.split('.')[-1]
             
-            for file in sep_files:
-                temp = ".\\" + path + "\\"
-                files.append(temp.replace("\\\\", "\\") + file)
+            if extension == "md":
+                name = file.split('.')[0]
+                html_pruned = (nu_rel_dir + name.replace(" ", "-")) + ".html"
+            elif extension in ("canvas", "base"):
+                name = file.split(".")[0] + "." + extension
+                html_pruned = (nu_rel_dir + name.replace(" ", "-")) + ".html"
+            else:
+                name = file
+                html_pruned = (nu_rel_dir + file.replace(" ", "-"))
             
-            for dir in reversed(dirs):
-                nu_dr = path + "\\" + dir
-                stack.appendleft(nu_dr)
-        
-            nu_rel_dir = "." + path + "\\"
-            for file in sep_files:
-                extension = file.split('.')[-1]
-                
-                if extension == "md":
-                    name = file.split('.')[0]
-                    html_pruned = (nu_rel_dir + name.replace(" ", "-")) + ".html"
-                    
-                    # Always store the full path (guaranteed unique)
-                    full_key = nu_rel_dir.replace("\\", "/")[2:] + name if path != "" else name
-                    link_to_filepath[full_key] = html_pruned
-                    
-                    # Track basename usage for conflict detection
-                    if name not in basename_tracker:
-                        basename_tracker[name] = []
-                    basename_tracker[name].append((full_key, html_pruned))
-                    
-                elif extension == "canvas":
-                    name = file.split(".")[0] + ".canvas"
-                    html_pruned = (nu_rel_dir + name.replace(" ", "-")) + ".html"
-                    
-                    # Always store the full path (guaranteed unique)  
-                    full_key = nu_rel_dir.replace("\\", "/")[2:] + name if path != "" else name
-                    link_to_filepath[full_key] = html_pruned
-                    
-                    # Track basename usage for conflict detection
-                    if name not in basename_tracker:
-                        basename_tracker[name] = []
-                    basename_tracker[name].append((full_key, html_pruned))
-                    
-                    
-                elif extension == "base":
-                    name = file.split(".")[0] + ".base"
-                    html_pruned = (nu_rel_dir + name.replace(" ", "-")) + ".html"
-                    
-                    # Always store the full path (guaranteed unique)  
-                    full_key = nu_rel_dir.replace("\\", "/")[2:] + name if path != "" else name
-                    link_to_filepath[full_key] = html_pruned
-                    
-                    # Track basename usage for conflict detection
-                    if name not in basename_tracker:
-                        basename_tracker[name] = []
-                    basename_tracker[name].append((full_key, html_pruned))
-                    
-                else:
-                    file_pruned = (nu_rel_dir + file.replace(" ", "-"))
-                    
-                    # Always store the full path (guaranteed unique)
-                    full_key = nu_rel_dir.replace("\\", "/")[2:] + file if path != "" else file
-                    link_to_filepath[full_key] = file_pruned
-                    
-                    # Track basename usage for conflict detection
-                    if file not in basename_tracker:
-                        basename_tracker[file] = []
-                    basename_tracker[file].append((full_key, file_pruned))
+            # Always store the full path (guaranteed unique)
+            full_key = "/".join(dir_parts + (name,))
+            link_to_filepath[full_key] = html_pruned
+            
+            # Track basename usage for conflict detection
+            if name not in basename_tracker:
+                basename_tracker[name] = []
+            basename_tracker[name].append((full_key, html_pruned))
+
+        self.scanner.save_snapshot()
         
         # Handle basename mappings - create unique names for conflicts
         for basename, file_list in basename_tracker.items():
@@ -0,0 +1,139 @@
+import re
+
+LINK_PATTERN = re.compile(r'(!?)\[\[([^\]]+)\]\]')
+
+class LinkGraph:
+    """Build-time graph of the wikilinks and ![[embeds]] between vault files.
+
+    Targets are resolved once through the LinkResolver, so the graph knows every note's
+    backlinks and broken links without opening any page. Embed edges are kept separately:
+    they decide what a page pulls in when rendered, so cycles among them are reported and
+    each file gets its transitive embeds in dependency-first (topological) order.
+    """
+
+    def __init__(self, link_resolver):
+        self.link_resolver = link_resolver
+        self.links = {}
+        self.embeds = {}
+        self.broken = {}
+
+    @staticmethod
+    def link_target(raw_link):
+        return raw_link.split('|')[0].split('#')[0].strip()
+
+    def add(self, file_id, content):
+        """Parse one file's links and embeds into the graph"""
+        links, embeds, broken = {}, [], []
+        for match in LINK_PATTERN.finditer(content):
+            target = self.link_target(match.group(2))
+            if not target:
+                continue
+            if target not in links:
+                links[target] = self.link_resolver.resolve(target)
+            resolved = links[target]
+            if resolved is None:
+                if target not in broken:
+                    broken.append(target)
+            elif match.group(1) and resolved not in embeds:
+                embeds.append(resolved)
+
+        self.links[file_id] = links
+        self.embeds[file_id] = embeds
+        if broken:
+            self.broken[file_id] = broken
+
+    def backlinks(self):
+        """Map each file ID to the IDs of the other files linking to or embedding it"""
+        result = {}
+        for source_id, links in self.links.items():
+            for target_id in dict.fromkeys(links.values()):
+                if target_id is not None and target_id != source_id:
+                    result.setdefault(target_id, []).append(source_id)
+        return result
+
+    def embed_cycles(self):
+        """Strongly connected groups of embeds (Tarjan), including files that embed themselves"""
+        index, lowlink, on_stack, stack, cycles = {}, {}, set(), [], []
+        counter = 0
+
+        for root in self.embeds:
+            if root in index:
+                continue
+            work = [(root, iter(self.embeds.get(root, [])))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                node, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    if child not in index:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.embeds.get(child, []))))
+                    elif child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.embeds.get(node, []):
+                        cycles.append(component[::-1])
+        return cycles
+
+    def embed_order(self, file_id):
+        """Every file transitively embedded by file_id, each listed after the files it embeds"""
+        order, visited = [], {file_id}
+        work = [(file_id, iter(self.embeds.get(file_id, [])))]
+        while work:
+            node, children = work[-1]
+            child = next(children, None)
+            if child is None:
+                work.pop()
+                if node != file_id:
+                    order.append(node)
+            elif child not in visited:
+                visited.add(child)
+                work.append((child, iter(self.embeds.get(child, []))))
+        return order
+
+    def embedders(self, file_ids):
+        """file_ids plus every file that embeds one of them, directly or through other embeds"""
+        reverse = {}
+        for source_id, embeds in self.embeds.items():
+            for target_id in embeds:
+                reverse.setdefault(target_id, []).append(source_id)
+
+        result = set(file_ids)
+        pending = list(result)
+        while pending:
+            for source_id in reverse.get(pending.pop(), []):
+                if source_id not in result:
+                    result.add(source_id)
+                    pending.append(source_id)
+        return result
+
+    def to_json(self):
+        """Per-file backlinks and ordered embed dependencies for renderer.js, omitting empty entries"""
+        graph = {}
+        for target_id, source_ids in self.backlinks().items():
+            graph.setdefault(target_id, {})["backlinks"] = source_ids
+        for file_id in self.embeds:
+            embeds = self.embed_order(file_id)
+            if embeds:
+                graph.setdefault(file_id, {})["embeds"] = embeds
+        return graph
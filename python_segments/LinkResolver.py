@@ -0,0 +1,68 @@
+import os
+
+class LinkResolver:
+    """Precomputed wikilink/embed resolution table shared by the build and renderer.js.
+
+    Every file contributes its vault-relative path and each folder-qualified suffix of it, both
+    with and without the extension, so 'Folder/Note', 'Note.md' and 'Note' are all direct keys.
+    When several files claim a key, the one needing the fewest extra leading folders wins, then
+    a .md file for extension-less keys, then the first file in scan order. Lowercased keys are
+    added last for case-insensitive links without shadowing any exact key.
+    """
+
+    def __init__(self, files, file_ids):
+        self.lookup = {}
+        self.build(files, file_ids)
+
+    @staticmethod
+    def normalize(link):
+        link = link.replace('\\', '/')
+        if link.startswith('./'):
+            link = link[2:]
+        return link
+
+    def build(self, files, file_ids):
+        candidates = {}
+        for order, file_path in enumerate(files):
+            parts = self.normalize(file_path).split('/')
+            stem = os.path.splitext(parts[-1])[0]
+            is_md = parts[-1].endswith('.md')
+            names = [(parts[-1], True)] + ([(stem, False)] if stem != parts[-1] else [])
+            # rank = how many leading folders the key leaves out
+            for rank in range(len(parts)):
+                for name, has_ext in names:
+                    key = "/".join(parts[rank:-1] + [name])
+                    entry = (rank, 0 if is_md or has_ext else 1, order, file_path, file_ids[file_path], has_ext)
+                    candidates.setdefault(key, []).append(entry)
+
+        for key, entries in candidates.items():
+            entries.sort()
+            self.lookup[key] = entries[0][4]
+            if '/' not in key and len(entries) > 1:
+                self.warn_ambiguous(key, entries)
+
+        for key in list(self.lookup):
+            self.lookup.setdefault(key.lower(), self.lookup[key])
+
+    @staticmethod
+    def warn_ambiguous(key, entries):
+        paths = [entry[3][2:] for entry in entries]
+        chosen = entries[0][3][2:]
+        if entries[0][5]:
+            print(f"Warning: Multiple files with name '{key}' found. Using: {chosen}")
+            print(f"  Conflicting files: {paths}")
+        elif chosen.endswith('.md') and sum(path.endswith('.md') for path in paths) == 1:
+            print(f"Info: Multiple files with basename '{key}' found. Using .md file for extension-less access: {chosen}")
+            print(f"  Other files: {[path for path in paths if path != chosen]}")
+            print(f"  Access non-md files using their full names with extensions.")
+        else:
+            print(f"Warning: Multiple files with basename '{key}' found. Using: {chosen}")
+            print(f"  Conflicting files: {paths}")
+            print(f"  Access other files using their full names with extensions.")
+
+    def resolve(self, link):
+        """File ID a link target points at, or None"""
+        key = self.normalize(link)
+        if key in self.lookup:
+            return self.lookup[key]
+        return self.lookup.get(key.lower())
@@ -0,0 +1,97 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+class Profiler:
+    """Phase timers, counters and per-file parse times for one export.
+
+    When disabled every method is a no-op, so the pipeline can call it unconditionally. Counters
+    and byte totals may be updated from worker threads. With a cProfile path, the profile covers
+    the calling thread only (worker threads are timed through the phase and file records).
+    """
+
+    def __init__(self, enabled=False, top_n=10, cprofile_path=None):
+        self.enabled = enabled or cprofile_path is not None
+        self.top_n = top_n
+        self.cprofile_path = cprofile_path
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.counters = {}
+        self.files = []
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.lock = threading.Lock()
+
+        self.cprofile = None
+        if cprofile_path is not None:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    @contextmanager
+    def timed_phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                phase = self.phases.setdefault(name, {"seconds": 0.0, "calls": 0})
+                phase["seconds"] += elapsed
+                phase["calls"] += 1
+
+    def phase(self, name):
+        """Context manager timing one pipeline phase; phases may repeat and are summed"""
+        return self.timed_phase(name) if self.enabled else nullcontext()
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_file(self, file, seconds, size):
+        """Parse time and size of one source file"""
+        if self.enabled:
+            with self.lock:
+                self.files.append((seconds, file, size))
+                self.bytes_read += size or 0
+
+    def record_written(self, size):
+        if self.enabled:
+            with self.lock:
+                self.bytes_written += size
+
+    def record_output(self, path):
+        if self.enabled and path is not None:
+            self.record_written(os.path.getsize(path))
+
+    def report(self):
+        slowest = sorted(self.files, reverse=True)[:self.top_n]
+        return {
+            "total_seconds": time.perf_counter() - self.started,
+            "phases": self.phases,
+            "counters": self.counters,
+            "files_parsed": len(self.files),
+            "parse_seconds": sum(seconds for seconds, _, _ in self.files),
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "slowest_files": [{"file": file, "seconds": seconds, "bytes": size} for seconds, file, size in slowest],
+        }
+
+    def write(self, report_path):
+        """Write the JSON report (and the cProfile dump, if one was requested)"""
+        if not self.enabled:
+            return
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofile_path)
+            print(f"Wrote cProfile stats to {self.cprofile_path}")
+
+        report_path = Path(report_path)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Wrote profile report to {report_path}")
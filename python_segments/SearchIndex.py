@@ -0,0 +1,70 @@
+import json
+import re
+from pathlib import Path
+
+MAX_TOKEN_LENGTH = 64
+PREFIX_LENGTH = 2
+
+class SearchIndex:
+    """Inverted index over note contents for the client-side content search.
+
+    Tokens are normalized exactly like normalize() in searcher.js and bucketed by their first
+    PREFIX_LENGTH characters. Each posting is [file id, occurrence count, first matching line],
+    which is enough to rank results and pull a snippet line without scanning the vault.
+    """
+
+    def __init__(self):
+        self.shards = {}
+
+    @staticmethod
+    def normalize(text):
+        return re.sub(r'[^a-z0-9\s]', ' ', text.lower())
+
+    @staticmethod
+    def canvas_text(content):
+        """The searchable text of a .canvas file: its text nodes, one per line (canvasText() in searcher.js)"""
+        try:
+            nodes = json.loads(content).get("nodes") or []
+        except (ValueError, AttributeError):
+            return ""
+        return '\n'.join(node["text"] for node in nodes if isinstance(node, dict) and isinstance(node.get("text"), str))
+
+    @staticmethod
+    def prefix(token):
+        return token[:PREFIX_LENGTH]
+
+    def add(self, file_id, content):
+        postings = {}
+        for line_number, line in enumerate(content.split('\n')):
+            for token in self.normalize(line).split():
+                if len(token) > MAX_TOKEN_LENGTH:
+                    continue
+                if token in postings:
+                    postings[token][1] += 1
+                else:
+                    postings[token] = [file_id, 1, line_number]
+
+        for token, posting in postings.items():
+            self.shards.setdefault(self.prefix(token), {}).setdefault(token, []).append(posting)
+
+    def write(self, out_directory, sharded):
+        """Emit the index as scripts calling registerSearchShard(), one per prefix or all in one file; returns the paths written"""
+        out_directory = Path(out_directory)
+        shard_dir = out_directory / 'search'
+
+        if sharded:
+            shard_dir.mkdir(parents=True, exist_ok=True)
+            written = []
+            for prefix, tokens in self.shards.items():
+                written.append(shard_dir / f"{prefix}.js")
+                with open(written[-1], "w", encoding='utf-8') as f:
+                    f.write(f"registerSearchShard({json.dumps(prefix)}, {json.dumps(tokens)});\n")
+            for shard_path in shard_dir.glob('*.js'):
+                if shard_path.stem not in self.shards:
+                    shard_path.unlink()
+            return written
+
+        with open(out_directory / 'search-index.js', "w", encoding='utf-8') as f:
+            for prefix, tokens in self.shards.items():
+                f.write(f"registerSearchShard({json.dumps(prefix)}, {json.dumps(tokens)});\n")
+        return [out_directory / 'search-index.js']
@@ -0,0 +1,135 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATE_NAME = ".omth-compress.json"
+FINGERPRINT_LENGTH = 10
+COMPRESSIBLE = (".html", ".js", ".css", ".json", ".svg")
+SIBLINGS = (".gz", ".br")
+
+class StaticAssets:
+    """Cache-friendly copies of an export: fingerprinted shared assets and precompressed siblings.
+
+    fingerprint() writes 'searcher.js' as 'searcher.<hash>.js' (and so on) next to the plain file,
+    so pages can reference a name that never changes content and be cached indefinitely.
+    compress() writes .gz (and, with the brotli package, .br) beside every text output. Which
+    content each sibling was made from is kept in .omth-compress.json, so a file whose content
+    hash is unchanged is not compressed again, even when it was rewritten.
+    """
+
+    def __init__(self, out_directory):
+        self.out_directory = Path(out_directory)
+
+    @staticmethod
+    def content_hash(data):
+        return hashlib.sha1(data).hexdigest()
+
+    @staticmethod
+    def fingerprinted_name(name, content_hash):
+        stem, dot, extension = name.rpartition('.')
+        return f"{stem}.{content_hash[:FINGERPRINT_LENGTH]}.{extension}" if dot else f"{name}.{content_hash[:FINGERPRINT_LENGTH]}"
+
+    def fingerprint(self, names):
+        """Write a content-hashed copy of each named asset, returning {name: fingerprinted name}"""
+        result = {}
+        for name in names:
+            path = self.out_directory / name
+            data = path.read_bytes()
+            fingerprinted = self.fingerprinted_name(name, self.content_hash(data))
+            if not (self.out_directory / fingerprinted).exists():
+                (self.out_directory / fingerprinted).write_bytes(data)
+            result[name] = fingerprinted
+        self.remove_fingerprints(names, keep=result.values())
+        return result
+
+    def remove_fingerprints(self, names, keep=()):
+        """Delete fingerprinted copies of the named assets (and their siblings), except those in keep"""
+        patterns = []
+        for name in names:
+            stem, dot, extension = name.rpartition('.')
+            patterns.append(re.compile(re.escape(stem) + r'\.[0-9a-f]{%d}' % FINGERPRINT_LENGTH + re.escape(dot + extension) + r'$'))
+        keep = set(keep)
+        for path in self.out_directory.iterdir():
+            if path.name not in keep and any(pattern.match(path.name) for pattern in patterns):
+                for stale in [path] + [Path(f"{path}{sibling}") for sibling in SIBLINGS]:
+                    if stale.exists():
+                        stale.unlink()
+
+    def text_outputs(self):
+        """Compressible files under the output directory, skipping the build's own dotfiles"""
+        for root, dirs, files in os.walk(self.out_directory):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                if name.endswith(COMPRESSIBLE) and not name.startswith('.'):
+                    yield Path(root, name)
+
+    def remove_orphaned_siblings(self):
+        """Delete .gz/.br files whose original output is gone"""
+        for root, dirs, files in os.walk(self.out_directory):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                for sibling in SIBLINGS:
+                    if name.endswith(sibling) and name[:-len(sibling)].endswith(COMPRESSIBLE) and name[:-len(sibling)] not in files:
+                        os.unlink(os.path.join(root, name))
+
+    def compress(self, level=9, map_jobs=map, profiler=None):
+        """Write gzip (and brotli) siblings for every changed text output, in parallel through map_jobs"""
+        state_path = self.out_directory / STATE_NAME
+        settings = f"{level}:{'brotli' if brotli is not None else 'gzip'}"
+        previous = {}
+        if state_path.exists():
+            try:
+                with open(state_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("settings") == settings:
+                    previous = data.get("files", {})
+            except (OSError, ValueError) as e:
+                print(f"Warning: Ignoring unreadable compression state {state_path}: {e}")
+
+        self.remove_orphaned_siblings()
+        paths = list(self.text_outputs())
+        # Brotli quality runs 0-11 against gzip's 1-9; scale so the top gzip level is brotli's best
+        quality = round(level * 11 / 9)
+
+        def compress_file(path):
+            key = path.relative_to(self.out_directory).as_posix()
+            st = path.stat()
+            entry = previous.get(key)
+            have_siblings = os.path.exists(f"{path}.gz") and (brotli is None or os.path.exists(f"{path}.br"))
+            if entry and have_siblings and entry[:2] == [st.st_mtime_ns, st.st_size]:
+                return key, entry, False
+
+            data = path.read_bytes()
+            content_hash = self.content_hash(data)
+            if not (entry and have_siblings and entry[2] == content_hash):
+                self.write_sibling(f"{path}.gz", gzip.compress(data, compresslevel=level, mtime=0))
+                if brotli is not None:
+                    self.write_sibling(f"{path}.br", brotli.compress(data, quality=quality))
+                if profiler is not None:
+                    profiler.record_written(os.path.getsize(f"{path}.gz"))
+                return key, [st.st_mtime_ns, st.st_size, content_hash], True
+            return key, [st.st_mtime_ns, st.st_size, content_hash], False
+
+        files = {}
+        for key, entry, compressed in map_jobs(compress_file, paths):
+            files[key] = entry
+            if profiler is not None:
+                profiler.count("files_compressed" if compressed else "compression_skipped")
+
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "files": files}, f)
+
+    @staticmethod
+    def write_sibling(path, data):
+        temporary = f"{path}.omth-tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
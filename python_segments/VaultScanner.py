@@ -0,0 +1,100 @@
+import json
+import os
+from fnmatch import fnmatch
+from pathlib import Path
+
+IGNORE_FILE_NAME = ".omthignore"
+SNAPSHOT_NAME = ".omth-scan.json"
+DEFAULT_IGNORE_PATTERNS = [".obsidian", ".trash", ".git", IGNORE_FILE_NAME]
+
+class VaultScanner:
+    """Walks a vault with os.scandir, honouring ignore patterns and an optional directory snapshot.
+
+    Directories starting with '.' or '~' and files starting with '~' are always skipped. Extra
+    fnmatch-style patterns come from the constructor and from an .omthignore file in the vault
+    root; each pattern is matched against both the entry name and its vault-relative path.
+
+    With a snapshot path, each directory's listing is persisted alongside its mtime. A directory
+    whose mtime is unchanged on the next scan reuses its stored listing instead of being read
+    again; its files are then reported without stat data, since their contents may still differ.
+    """
+
+    def __init__(self, in_directory, ignore_patterns=None, snapshot_path=None):
+        self.in_directory = in_directory
+        self.ignore_patterns = DEFAULT_IGNORE_PATTERNS + list(ignore_patterns or []) + self.read_ignore_file()
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.previous_snapshot = self.load_snapshot()
+        self.snapshot = {}
+
+    def read_ignore_file(self):
+        ignore_file = os.path.join(self.in_directory, IGNORE_FILE_NAME)
+        if not os.path.isfile(ignore_file):
+            return []
+        with open(ignore_file, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+    def load_snapshot(self):
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return {}
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable scan snapshot {self.snapshot_path}: {e}")
+            return {}
+        # Listings were filtered with the old patterns, so they are only reusable if those still apply
+        if data.get("ignore_patterns") != self.ignore_patterns:
+            return {}
+        return data.get("directories", {})
+
+    def save_snapshot(self):
+        if self.snapshot_path is None:
+            return
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.snapshot_path, "w", encoding="utf-8") as f:
+            json.dump({"ignore_patterns": self.ignore_patterns, "directories": self.snapshot}, f)
+
+    def is_ignored(self, name, rel_path, is_dir):
+        if name[0] == '~' or (is_dir and name[0] == '.'):
+            return True
+        return any(fnmatch(name, pattern) or fnmatch(rel_path, pattern) for pattern in self.ignore_patterns)
+
+    def list_directory(self, dir_parts):
+        """Return (files, dirs) for one directory, where files are (name, mtime_ns, size) tuples"""
+        full_dir = os.path.join(self.in_directory, *dir_parts)
+        key = "/".join(dir_parts)
+        dir_mtime = os.stat(full_dir).st_mtime_ns
+
+        cached = self.previous_snapshot.get(key)
+        if cached and cached["mtime"] == dir_mtime:
+            self.snapshot[key] = cached
+            return [(name, None, None) for name in cached["files"]], cached["dirs"]
+
+        files, dirs = [], []
+        with os.scandir(full_dir) as entries:
+            for entry in entries:
+                rel_path = "/".join(dir_parts + (entry.name,))
+                if entry.is_dir():
+                    if not self.is_ignored(entry.name, rel_path, True):
+                        dirs.append(entry.name)
+                elif entry.is_file():
+                    if not self.is_ignored(entry.name, rel_path, False):
+                        st = entry.stat()
+                        files.append((entry.name, st.st_mtime_ns, st.st_size))
+
+        files.sort()
+        dirs.sort()
+        self.snapshot[key] = {"mtime": dir_mtime, "files": [name for name, _, _ in files], "dirs": dirs}
+        return files, dirs
+
+    def scan(self):
+        """Yield (dir_parts, file_name, mtime_ns, size) depth-first, a directory's files before its subdirectories"""
+        self.snapshot = {}
+        stack = [()]
+        while stack:
+            dir_parts = stack.pop()
+            files, dirs = self.list_directory(dir_parts)
+            for name, mtime, size in files:
+                yield dir_parts, name, mtime, size
+            for dir_name in reversed(dirs):
+                stack.append(dir_parts + (dir_name,))
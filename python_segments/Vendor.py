@@ -0,0 +1,138 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import tarfile
+import urllib.request
+from pathlib import Path
+
+from python_segments.AttachmentExporter import AttachmentExporter
+
+LOCK_NAME = "vendor.json"
+REGISTRY = "https://registry.npmjs.org"
+
+# npm package -> pinned version, the SRI hash of its registry tarball, and {path inside the package:
+# path under the vendor directory}; a trailing '/' copies a tree. A package without a pinned hash
+# trusts the registry's on its first fetch, with a warning, and vendor.json pins it from then on.
+PACKAGES = {
+    "marked": {"version": "4.3.0",
+               "integrity": "sha512-PRsaiG84bK+AMvxziE/lCFss8juXjNaWzVbN5tXAm4XjeaS9NAHhop+PjQxz2A9h8Q4M/xGmzP8vqNwy6JeK0A==",
+               "files": {"marked.min.js": "marked.min.js"}},
+    "mathjax": {"version": "3.2.2",
+                "integrity": "sha512-Bt+SSVU8eBG27zChVewOicYs7Xsdt40qm4+UpHyX7k0/O9NliPc+x77k1/FEsPsjKPZGJvtRZM1vO+geW0OhGw==",
+                "files": {"es5/": "mathjax/"}},
+    "lucide": {"version": "0.453.0", "integrity": None, "files": {"dist/umd/lucide.min.js": "lucide.min.js"}},
+    "mermaid": {"version": "10.9.1", "integrity": None, "files": {"dist/mermaid.min.js": "mermaid.min.js"}},
+}
+
+# Script each page loads for a library, vendored (relative to the export's vendor/ folder) or from its CDN
+SCRIPTS = {
+    "marked": "marked.min.js",
+    "mathjax": "mathjax/tex-mml-chtml.js",
+    "lucide": "lucide.min.js",
+    "mermaid": "mermaid.min.js",
+}
+CDN_SCRIPTS = {
+    "marked": "https://cdnjs.cloudflare.com/ajax/libs/marked/4.3.0/marked.min.js",
+    "mathjax": "https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js",
+    "lucide": "https://unpkg.com/lucide@latest",
+    "mermaid": "https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.min.js",
+}
+
+class Vendor:
+    """Pinned local copies of the browser libraries pages use, for exports that must work offline.
+
+    fetch() downloads each package's npm tarball once, checks it against the integrity hash
+    pinned in PACKAGES (or, for a package without one, the hash vendor.json recorded when it was
+    first fetched) and unpacks the files pages need into the vendor directory, recording versions
+    and hashes in vendor.json. install() copies that directory into the export's vendor/ folder,
+    skipping files that are already up to date.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def read_lock(self):
+        """vendor.json: package -> the version and integrity hash that were unpacked"""
+        try:
+            with open(self.directory / LOCK_NAME, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def check(self):
+        """Raise ValueError unless the directory holds the pinned version of every package"""
+        lock = self.read_lock()
+        stale = [f"{name}@{package['version']}" for name, package in PACKAGES.items()
+                 if not self.is_current(lock.get(name, {}), package)]
+        if stale:
+            raise ValueError(f"Vendor directory {self.directory} is missing {', '.join(stale)}; fetch it with --fetch-vendor")
+
+    @staticmethod
+    def is_current(locked, package):
+        return (locked.get("version") == package["version"] and "integrity" in locked
+                and package["integrity"] in (None, locked["integrity"]))
+
+    @staticmethod
+    def download(url):
+        with urllib.request.urlopen(url, timeout=60) as response:
+            return response.read()
+
+    @staticmethod
+    def verify(data, integrity):
+        algorithm, _, expected = integrity.partition('-')
+        if base64.b64encode(hashlib.new(algorithm, data).digest()).decode("ascii") != expected:
+            raise ValueError(f"Integrity check failed ({integrity})")
+
+    def fetch(self):
+        """Download and unpack every pinned package that is not already present"""
+        lock = self.read_lock()
+        try:
+            for name, package in PACKAGES.items():
+                if self.is_current(lock.get(name, {}), package):
+                    continue
+                metadata = json.loads(self.download(f"{REGISTRY}/{name}/{package['version']}"))
+                integrity = package["integrity"]
+                if integrity is None:
+                    integrity = metadata["dist"]["integrity"]
+                    print(f"Warning: No integrity hash is pinned for {name}@{package['version']}; "
+                          f"trusting the registry's {integrity} and recording it in {LOCK_NAME}")
+                tarball = self.download(metadata["dist"]["tarball"])
+                self.verify(tarball, integrity)
+                self.unpack(tarball, package["files"])
+                lock[name] = {"version": package["version"], "integrity": integrity}
+                print(f"Vendored {name}@{package['version']}")
+        finally:
+            # Packages unpacked before a failure are kept
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / LOCK_NAME, "w", encoding="utf-8") as f:
+                json.dump(lock, f, indent=2)
+
+    def unpack(self, tarball, files):
+        with tarfile.open(fileobj=io.BytesIO(tarball), mode="r:gz") as archive:
+            for member in archive.getmembers():
+                if not member.isfile():
+                    continue
+                # npm tarballs keep everything under a single top-level folder, usually 'package/'
+                inner = member.name.split('/', 1)[-1]
+                for source, target in files.items():
+                    if inner == source or (source.endswith('/') and inner.startswith(source)):
+                        relative = target + inner[len(source):] if source.endswith('/') else target
+                        destination = (self.directory / relative).resolve()
+                        if self.directory.resolve() not in destination.parents:
+                            raise ValueError(f"Refusing to unpack {member.name} outside {self.directory}")
+                        destination.parent.mkdir(parents=True, exist_ok=True)
+                        with archive.extractfile(member) as f_in, open(destination, "wb") as f_out:
+                            f_out.write(f_in.read())
+
+    def install(self, out_directory):
+        """Copy the vendored files into <out_directory>/vendor"""
+        exporter = AttachmentExporter()
+        target = Path(out_directory) / "vendor"
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name == LOCK_NAME:
+                    continue
+                source = Path(root, name)
+                exporter.export(source, target / source.relative_to(self.directory))
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from python_segments.VaultScanner import VaultScanner
+
+EVENTS_PATH = "/__omth_events"
+RELOAD_SCRIPT = f"<script>new EventSource('{EVENTS_PATH}').onmessage = () => location.reload();</script>"
+
+class Watcher:
+    """Polls a vault for changes and reruns an export once a burst of edits settles.
+
+    Each poll is an os.scandir walk comparing (mtime, size) per file, which stays in the
+    milliseconds on vaults of thousands of notes and needs no platform-specific watcher. With a
+    port, the output directory is also served over HTTP; served pages get a small script
+    injected that reloads them whenever a rebuild finishes.
+    """
+
+    def __init__(self, in_directory, out_directory, build, ignore_patterns=None, port=None, interval=0.25, debounce=0.2):
+        self.in_directory = os.path.abspath(in_directory)
+        self.out_directory = os.path.abspath(out_directory)
+        self.build = build
+        self.port = port
+        self.interval = interval
+        self.debounce = debounce
+
+        ignore_patterns = list(ignore_patterns or [])
+        # An export written inside the vault must not retrigger itself
+        if os.path.commonpath([self.in_directory, self.out_directory]) == self.in_directory \
+                and self.out_directory != self.in_directory:
+            ignore_patterns.append(os.path.relpath(self.out_directory, self.in_directory).replace(os.sep, "/"))
+        self.ignore_patterns = ignore_patterns
+
+        self.generation = 0
+        self.generation_changed = threading.Condition()
+
+    def snapshot(self):
+        """(mtime, size) of every vault file, keyed by vault-relative path"""
+        scanner = VaultScanner(self.in_directory, ignore_patterns=self.ignore_patterns)
+        return {"/".join(dir_parts + (name,)): (mtime, size) for dir_parts, name, mtime, size in scanner.scan()}
+
+    def rebuild(self):
+        started = time.perf_counter()
+        try:
+            self.build()
+        except Exception as e:
+            print(f"Error rebuilding: {e}")
+            return
+        print(f"Rebuilt in {time.perf_counter() - started:.2f}s")
+        with self.generation_changed:
+            self.generation += 1
+            self.generation_changed.notify_all()
+
+    def serve(self):
+        server = LiveReloadServer(("127.0.0.1", self.port), self)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Serving {self.out_directory} at http://127.0.0.1:{server.server_address[1]}/")
+        return server
+
+    def run(self):
+        """Watch until interrupted, rebuilding after changes have been quiet for the debounce period"""
+        server = self.serve() if self.port is not None else None
+        print(f"Watching {self.in_directory} for changes (Ctrl+C to stop)")
+
+        previous = self.snapshot()
+        last_change = None
+        try:
+            while True:
+                time.sleep(self.interval)
+                current = self.snapshot()
+                if current != previous:
+                    previous = current
+                    last_change = time.monotonic()
+                elif last_change is not None and time.monotonic() - last_change >= self.debounce:
+                    last_change = None
+                    self.rebuild()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if server is not None:
+                server.shutdown()
+
+class LiveReloadServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address, watcher):
+        self.watcher = watcher
+        super().__init__(server_address, partial(LiveReloadHandler, directory=watcher.out_directory))
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """Static file handler that adds the reload script to HTML pages and streams rebuild events"""
+
+    def do_GET(self):
+        if self.path == EVENTS_PATH:
+            self.stream_events()
+            return
+
+        path = self.translate_path(self.path)
+        if not path.endswith(".html") or not os.path.isfile(path):
+            super().do_GET()
+            return
+
+        with open(path, "r", encoding="utf-8") as f:
+            page = f.read()
+        if "</body>" in page:
+            page = page.replace("</body>", RELOAD_SCRIPT + "\n</body>", 1)
+        else:
+            page += RELOAD_SCRIPT
+        body = page.encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_events(self):
+        """Server-sent events: one message per finished rebuild, with keep-alive comments in between"""
+        watcher = self.server.watcher
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        seen = watcher.generation
+        try:
+            while True:
+                with watcher.generation_changed:
+                    watcher.generation_changed.wait_for(lambda: watcher.generation != seen, timeout=15)
+                    current = watcher.generation
+                if current != seen:
+                    seen = current
+                    self.wfile.write(f"data: {current}\n\n".encode("utf-8"))
+                else:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def end_headers(self):
+        # Rebuilt assets keep their names, so the browser must not serve them from cache
+        if self.path != EVENTS_PATH:
+            self.send_header("Cache-Control", "no-store")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
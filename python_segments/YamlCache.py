@@ -0,0 +1,95 @@
+import datetime
+import json
+import threading
+from pathlib import Path
+
+import yaml
+
+CACHE_NAME = ".omth-yaml-cache.json"
+CACHE_VERSION = 1
+
+# libyaml's C loader is several times faster than the pure-Python one; fall back when PyYAML was built without it
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+class YamlCache:
+    """Parses frontmatter and .base YAML, caching results on disk by the source file's content hash.
+
+    Results are stored in their JSON-ready form, so a cache hit skips YAML parsing and
+    normalization entirely. Entries not used (or kept) by a build are dropped when it saves,
+    which keeps the cache the size of the vault. Calls may come from worker threads.
+    """
+
+    def __init__(self, out_directory):
+        self.path = Path(out_directory) / CACHE_NAME
+        self.fingerprint = f"{CACHE_VERSION}:{yaml.__version__}:{Loader.__name__}"
+        self.previous = {}
+        self.entries = {}
+        self.lock = threading.Lock()
+
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("fingerprint") == self.fingerprint:
+                    self.previous = data.get("entries", {})
+            except (OSError, ValueError) as e:
+                print(f"Warning: Ignoring unreadable YAML cache {self.path}: {e}")
+
+    @staticmethod
+    def normalize_value(value):
+        """Frontmatter values as renderer.js expects them: strings, or lists of strings"""
+        if isinstance(value, list):
+            # An unquoted [[Link]] parses as a nested list; turn it back into the wikilink it was meant to be
+            if len(value) == 1 and isinstance(value[0], list) and len(value[0]) == 1 and isinstance(value[0][0], str):
+                return f"[[{value[0][0]}]]"
+            return [YamlCache.normalize_value(item) for item in value]
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+        if isinstance(value, dict):
+            return json.dumps(value, default=str)
+        return str(value)
+
+    def keep(self, kind, content_hash):
+        """Carry an entry over for a file that was not re-read this build"""
+        key = f"{kind}:{content_hash}"
+        with self.lock:
+            if key not in self.entries and key in self.previous:
+                self.entries[key] = self.previous[key]
+
+    def cached(self, kind, content_hash, text, parse):
+        key = f"{kind}:{content_hash}"
+        with self.lock:
+            if key in self.entries:
+                return self.entries[key], True
+            if key in self.previous:
+                self.entries[key] = self.previous[key]
+                return self.entries[key], True
+
+        result = parse(text)
+        with self.lock:
+            self.entries[key] = result
+        return result, False
+
+    def parse_frontmatter(self, text, content_hash):
+        """Frontmatter properties as {name: string or list of strings}, and whether it was a cache hit"""
+        def parse(text):
+            parsed = yaml.load(text, Loader=Loader)
+            if not isinstance(parsed, dict):
+                return {}
+            return {str(key): self.normalize_value(value) for key, value in parsed.items()}
+        return self.cached("frontmatter", content_hash, text, parse)
+
+    def parse_base(self, text, content_hash):
+        """A .base file as its JSON text, and whether it was a cache hit"""
+        return self.cached("base", content_hash, text, lambda text: json.dumps(yaml.load(text, Loader=Loader), default=str))
+
+    def save(self):
+        if self.entries == self.previous:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": self.fingerprint, "entries": self.entries}, f)
@@ -1,47 +1,258 @@
-zoom = 1
-translate_x = 0
-translate_y = 0
-scroll_top = 0
-scroll_left = 0
+// Pan and zoom for exported canvases, and viewport-virtualized rendering of large ones.
+//
+// renderer.js writes small canvases out in full. Large ones only carry their layout in a
+// <script class="canvas-data"> block: nodes and edges go into a grid index over their bounding
+// boxes, and DOM is created only for what intersects the visible area (plus some overscan).
+// Node text is rendered the first time it comes into view. Scroll, wheel and resize events only
+// schedule work; each canvas updates at most once per animation frame.
 
-innard = document.getElementById("innard")
+const CANVAS_GRID_CELL = 1024
+const CANVAS_OVERSCAN = 0.5
+const CANVAS_MIN_ZOOM = 0.05
+const CANVAS_MAX_ZOOM = 4
 
-const scrollyDiv = document.getElementById('scrollable-box');
+class CanvasGrid {
+    constructor(cellSize) {
+        this.cellSize = cellSize
+        this.cells = new Map()
+    }
 
-scrollyDiv.addEventListener('scroll', (e) => {
-  scroll_top = e.target.scrollTop
-  scroll_left = e.target.scrollLeft
-})
+    insert(index, left, top, right, bottom) {
+        for (let cx = Math.floor(left / this.cellSize); cx <= Math.floor(right / this.cellSize); cx++) {
+            for (let cy = Math.floor(top / this.cellSize); cy <= Math.floor(bottom / this.cellSize); cy++) {
+                const key = cx + ',' + cy
+                if (!this.cells.has(key)) this.cells.set(key, [])
+                this.cells.get(key).push(index)
+            }
+        }
+    }
 
-function set_zoom(){
-    return "scale(" + zoom + ") translate(" + translate_x + "px, " + translate_y + "px)"
+    query(left, top, right, bottom) {
+        const found = new Set()
+        for (let cx = Math.floor(left / this.cellSize); cx <= Math.floor(right / this.cellSize); cx++) {
+            for (let cy = Math.floor(top / this.cellSize); cy <= Math.floor(bottom / this.cellSize); cy++) {
+                const items = this.cells.get(cx + ',' + cy)
+                if (items) items.forEach(index => found.add(index))
+            }
+        }
+        return found
+    }
 }
 
-function zoom_in() {
-    if(zoom > 0.05){
-        zoom += 0.05
+class CanvasView {
+    constructor(outerBox) {
+        this.outerBox = outerBox
+        this.scrollBox = outerBox.querySelector('#scrollable-box')
+        this.innard = outerBox.querySelector('#innard')
+        this.svg = outerBox.querySelector('svg')
+        this.zoom = 1
+        this.frame = 0
+        this.pendingAnchor = null
+
+        const dataElement = outerBox.querySelector('script.canvas-data')
+        this.data = dataElement ? JSON.parse(dataElement.textContent) : null
+        if (this.data) {
+            this.buildIndex()
+            this.nodeElements = new Map()
+            this.edgeElements = new Map()
+            this.processor = null
+            this.renderQueue = Promise.resolve()
+        }
+
+        this.innard.style.transformOrigin = '0 0'
+        this.scrollBox.addEventListener('scroll', () => this.schedule(), { passive: true })
+        this.scrollBox.addEventListener('wheel', event => this.onWheel(event), { passive: false })
+        window.addEventListener('resize', () => this.schedule())
+        this.schedule()
     }
-    else {
-        zoom *= 2
+
+    buildIndex() {
+        this.nodeGrid = new CanvasGrid(CANVAS_GRID_CELL)
+        this.data.nodes.forEach((node, index) => {
+            this.nodeGrid.insert(index, node.left, node.top, node.left + node.width, node.top + node.height)
+        })
+        this.edgeGrid = new CanvasGrid(CANVAS_GRID_CELL)
+        this.data.edges.forEach((edge, index) => {
+            this.edgeGrid.insert(index, Math.min(edge.x1, edge.x2), Math.min(edge.y1, edge.y2),
+                                 Math.max(edge.x1, edge.x2), Math.max(edge.y1, edge.y2))
+        })
     }
-    innard.style.transformOrigin = `${translate_x + (innard.offsetWidth/2)} ${translate_y + (innard.offsetHeight/2)}`
-    innard.style.transform = set_zoom()
-}
 
-function zoom_out() {
-    if(zoom > 0.05){
-        zoom -= 0.05
+    schedule() {
+        if (!this.frame) {
+            this.frame = requestAnimationFrame(() => {
+                this.frame = 0
+                this.update()
+            })
+        }
+    }
+
+    // Zoom by factor, keeping the canvas point under (clientX, clientY) (default: the centre) in place
+    zoomBy(factor, clientX, clientY) {
+        const rect = this.scrollBox.getBoundingClientRect()
+        const offsetX = clientX === undefined ? this.scrollBox.clientWidth / 2 : clientX - rect.left
+        const offsetY = clientY === undefined ? this.scrollBox.clientHeight / 2 : clientY - rect.top
+        // Anchors of several events in one frame chain through the zoom they were made at
+        const anchor = this.pendingAnchor || {
+            x: (this.scrollBox.scrollLeft + offsetX) / this.zoom,
+            y: (this.scrollBox.scrollTop + offsetY) / this.zoom,
+            offsetX: offsetX,
+            offsetY: offsetY,
+        }
+        this.zoom = Math.min(CANVAS_MAX_ZOOM, Math.max(CANVAS_MIN_ZOOM, this.zoom * factor))
+        this.pendingAnchor = anchor
+        this.schedule()
+    }
+
+    setZoom(zoom) {
+        this.zoomBy(zoom / this.zoom)
+    }
+
+    onWheel(event) {
+        if (!event.ctrlKey && !event.metaKey) return
+        event.preventDefault()
+        this.zoomBy(Math.exp(-event.deltaY * 0.002), event.clientX, event.clientY)
+    }
+
+    update() {
+        this.innard.style.transform = 'scale(' + this.zoom + ')'
+        if (this.pendingAnchor) {
+            const anchor = this.pendingAnchor
+            this.pendingAnchor = null
+            this.scrollBox.scrollLeft = anchor.x * this.zoom - anchor.offsetX
+            this.scrollBox.scrollTop = anchor.y * this.zoom - anchor.offsetY
+        }
+        if (this.data) this.render()
+    }
+
+    // The visible area in #innard coordinates, grown by CANVAS_OVERSCAN of itself on each side
+    viewport() {
+        const width = this.scrollBox.clientWidth / this.zoom
+        const height = this.scrollBox.clientHeight / this.zoom
+        const left = this.scrollBox.scrollLeft / this.zoom
+        const top = this.scrollBox.scrollTop / this.zoom
+        return [left - width * CANVAS_OVERSCAN, top - height * CANVAS_OVERSCAN,
+                left + width * (1 + CANVAS_OVERSCAN), top + height * (1 + CANVAS_OVERSCAN)]
+    }
+
+    render() {
+        const [left, top, right, bottom] = this.viewport()
+        const visibleNodes = this.nodeGrid.query(left, top, right, bottom)
+        const visibleEdges = this.edgeGrid.query(left, top, right, bottom)
+
+        for (const [index, element] of this.nodeElements) {
+            if (!visibleNodes.has(index)) {
+                element.remove()
+                this.nodeElements.delete(index)
+            }
+        }
+        for (const [index, elements] of this.edgeElements) {
+            if (!visibleEdges.has(index)) {
+                elements.forEach(element => element.remove())
+                this.edgeElements.delete(index)
+            }
+        }
+
+        for (const index of visibleEdges) {
+            if (!this.edgeElements.has(index)) this.edgeElements.set(index, this.createEdge(this.data.edges[index]))
+        }
+        for (const index of visibleNodes) {
+            if (!this.nodeElements.has(index)) this.nodeElements.set(index, this.createNode(this.data.nodes[index]))
+        }
+    }
+
+    createEdge(edge) {
+        const line = document.createElementNS('http://www.w3.org/2000/svg', 'line')
+        line.setAttribute('class', 'line')
+        line.setAttribute('x1', edge.x1)
+        line.setAttribute('y1', edge.y1)
+        line.setAttribute('x2', edge.x2)
+        line.setAttribute('y2', edge.y2)
+        this.svg.appendChild(line)
+
+        // Arrows sit before the svg, and nodes after it, as in a fully rendered canvas
+        const arrow = document.createElement('i')
+        arrow.className = 'arrow ' + edge.side
+        arrow.style.left = edge.arrowLeft + 'px'
+        arrow.style.top = edge.arrowTop + 'px'
+        this.innard.insertBefore(arrow, this.svg)
+        return [line, arrow]
     }
-    else {
-        zoom /= 2
+
+    createNode(node) {
+        const element = document.createElement('div')
+        element.className = node.classes
+        element.id = node.id
+        element.style.left = node.left + 'px'
+        element.style.top = node.top + 'px'
+        element.style.width = node.width + 'px'
+        element.style.height = node.height + 'px'
+        this.innard.appendChild(element)
+
+        if (node.html !== undefined) {
+            element.innerHTML = node.html
+            this.decorate(element)
+        } else if (node.text) {
+            this.renderNodeText(node).then(() => {
+                if (element.isConnected) {
+                    element.innerHTML = node.html
+                    this.decorate(element)
+                }
+            })
+        }
+        return element
+    }
+
+    // Render a node's markdown once and keep the HTML, so scrolling back is just DOM creation
+    renderNodeText(node) {
+        if (!node.rendering) {
+            this.processor = this.processor || new ObsidianProcessor()
+            // One at a time: the processor keeps per-render state (math placeholders) on itself
+            node.rendering = this.renderQueue = this.renderQueue
+                .then(() => this.processor.renderCanvasNodeText(node.text))
+                .then(html => {
+                    node.html = html
+                })
+        }
+        return node.rendering
+    }
+
+    decorate(element) {
+        if (window.MathJax && window.MathJax.typesetPromise) {
+            window.MathJax.typesetPromise([element]).catch(error => console.error('MathJax processing error:', error))
+        }
+        if (window.lucide && window.lucide.createIcons) {
+            lucide.createIcons()
+        }
     }
-    innard.style.transformOrigin = `${translate_x + (innard.offsetWidth/2)} ${translate_y + (innard.offsetHeight/2)}`
-    innard.style.transform = set_zoom()
+}
+
+const JsonCanvas = {
+    views: [],
+
+    // Set up every canvas under root that isn't set up yet; renderer.js calls this after rendering
+    mountAll(root) {
+        root.querySelectorAll('#outer-box').forEach(outerBox => {
+            if (!outerBox.dataset.mounted && outerBox.querySelector('#scrollable-box')) {
+                outerBox.dataset.mounted = 'true'
+                this.views.push(new CanvasView(outerBox))
+            }
+        })
+    },
+}
+window.JsonCanvas = JsonCanvas
+
+function zoom_in() {
+    JsonCanvas.views.forEach(view => view.zoomBy(1.25))
+}
+
+function zoom_out() {
+    JsonCanvas.views.forEach(view => view.zoomBy(0.8))
 }
 
 function reset_zoom() {
-    zoom = 1
-    translate_x = 0
-    translate_y = 0
-    innard.style.transform = set_zoom()
+    JsonCanvas.views.forEach(view => view.setZoom(1))
 }
+
+// Prerendered canvases are already in the page when this script runs
+JsonCanvas.mountAll(document)
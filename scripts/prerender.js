@@ -0,0 +1,77 @@
+// Renders exported pages ahead of time by running the exported renderer.js under Node.
+// Usage: node prerender.js <out_directory> [marked.min.js]
+// Reads a JSON array of {current, type} jobs on stdin and writes one JSON line per job to stdout.
+
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const [outDirectory, markedPath] = process.argv.slice(2);
+
+const noop = () => {};
+
+// Only the handful of DOM members renderer.js touches outside of renderContent are stubbed
+const article = {
+    attributes: {},
+    getAttribute(name) { return this.attributes[name]; },
+    setAttribute(name, value) { this.attributes[name] = value; },
+};
+
+const context = vm.createContext({
+    document: {
+        currentScript: null,
+        querySelector: selector => selector === 'article' ? article : null,
+        getElementById: () => null,
+        addEventListener: noop,
+    },
+    HTMLElement: { prototype: { popover: null } },
+    console: { log: noop, warn: noop, error: (...args) => process.stderr.write(args.join(' ') + '\n') },
+    fetch: async url => {
+        const body = fs.readFileSync(path.join(outDirectory, url), 'utf8');
+        return { ok: true, json: async () => JSON.parse(body) };
+    },
+    setTimeout,
+    clearTimeout,
+    // Tells renderer.js there is no browser to finish rendering later (see buildVirtualCanvas)
+    omthPrerender: true,
+});
+context.window = context;
+
+if (markedPath) {
+    vm.runInContext(fs.readFileSync(markedPath, 'utf8'), context, { filename: markedPath });
+} else {
+    const markedModule = require('marked');
+    context.marked = markedModule.marked || markedModule;
+}
+
+vm.runInContext(fs.readFileSync(path.join(outDirectory, 'renderer.js'), 'utf8'), context, { filename: 'renderer.js' });
+
+const renderPage = vm.runInContext(`(async (job) => {
+    const processor = new ObsidianProcessor();
+    const content = await getFile(job.current);
+    const [html, headers] = await processor.processFile(content, job.type, resolveFileId(job.current));
+    return { html: html, toc: headers.length > 0 ? processor.buildTableOfContents(headers) : '' };
+})`, context);
+
+async function main() {
+    const jobs = JSON.parse(fs.readFileSync(0, 'utf8'));
+
+    for (let index = 0; index < jobs.length; index++) {
+        const job = jobs[index];
+        article.setAttribute('data-current-file', job.current);
+        article.setAttribute('data-type', job.type);
+
+        let result;
+        try {
+            result = { index: index, ...(await renderPage(job)) };
+        } catch (error) {
+            result = { index: index, error: String(error && error.stack || error) };
+        }
+        process.stdout.write(JSON.stringify(result) + '\n');
+    }
+}
+
+main().catch(error => {
+    process.stderr.write(String(error && error.stack || error) + '\n');
+    process.exit(1);
+});
@@ -1,14 +1,71 @@
-// Note: This file CANNOT be run in this state. It must be processed first, plopping in relevant content in these four consts here. 
+// Note: This file CANNOT be run in this state. It must be processed first, plopping in relevant content in these consts here. 
 
-const fileLinks = {/*file_links*/}
-const fileContentMap = {/*file_content_map*/}
+const fileHrefs = {/*file_hrefs*/}
+const linkIndex = {/*link_index*/}
+const linkGraph = {/*link_graph*/}
+const baseViews = {/*base_views*/}
 const fileContents = {/*file_contents*/}
+const fileContentShards = {/*file_content_shards*/}
+const searchIndexSharded = /*search_index_sharded*/false
 const fileProperties = {/*file_properties*/}
 const inDirectory = /*in_directory*/0
 const outDirectory = /*out_directory*/0
 
-function getFile(id){
-    return fileContents[fileContentMap[id]];
+// Content shards live next to renderer.js, so resolve them relative to this script rather than the page
+const siteRoot = document.currentScript ? document.currentScript.src.replace(/[^/]*$/, '') : '';
+const shardRequests = {};
+
+function loadFileContent(fileId) {
+    if (fileId === undefined || fileId === null) {
+        return Promise.resolve(undefined);
+    }
+    if (fileContents.hasOwnProperty(fileId)) {
+        return Promise.resolve(fileContents[fileId]);
+    }
+
+    const shard = fileContentShards[fileId];
+    if (!shard) {
+        return Promise.resolve(undefined);
+    }
+
+    if (!shardRequests[shard]) {
+        shardRequests[shard] = fetch(`${siteRoot}content/${shard}.json`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .catch(error => {
+                console.error(`Failed to load content shard ${shard}:`, error);
+                delete shardRequests[shard];
+                return undefined;
+            });
+    }
+
+    return shardRequests[shard].then(content => {
+        if (content !== undefined) {
+            fileContents[fileId] = content;
+        }
+        return content;
+    });
+}
+
+// linkIndex already holds every exact, lowercase, basename and folder-qualified key, so a lookup is one probe
+function resolveFileId(link) {
+    if (link === undefined || link === null) {
+        return null;
+    }
+    const key = link.replace(/\\/g, '/').replace(/^\.\//, '');
+    if (linkIndex.hasOwnProperty(key)) {
+        return linkIndex[key];
+    }
+    const lowerKey = key.toLowerCase();
+    return linkIndex.hasOwnProperty(lowerKey) ? linkIndex[lowerKey] : null;
+}
+
+function getFile(link){
+    return loadFileContent(resolveFileId(link));
 }
 
 class ObsidianProcessor {
@@ -28,6 +85,8 @@ class ObsidianProcessor {
             MIN_CANVAS_HEIGHT: 1000,
             CANVAS_PADDING: 1000,
             VALID_SIDES: new Set(["left", "right", "top", "bottom"]),
+            // Canvases with more nodes than this are rendered by json_canvas.js as they scroll into view
+            VIRTUALIZE_THRESHOLD: 200,
         }
     }
 
@@ -55,90 +114,27 @@ class ObsidianProcessor {
         return content;
     }
 
-    async processCanvas(jsonContent) {
+    async processCanvas(jsonContent, virtualize = true) {
         try {
             const data = JSON.parse(jsonContent);
-            const nodes = data.nodes || [];
-            const edges = data.edges || [];
+            const { nodes, edges, svgWidth, svgHeight } = this.layoutCanvas(data.nodes || [], data.edges || []);
 
-            //process nodes
-            const nodesById = {};
-            let divPart = "";
-            let maxX = 0;
-            let maxY = 0;
+            // Large canvases only ship their layout; json_canvas.js creates DOM for what is in view
+            if (virtualize && nodes.length > this.canvas_constants.VIRTUALIZE_THRESHOLD) {
+                return await this.buildVirtualCanvas(nodes, edges, svgWidth, svgHeight);
+            }
 
+            let divPart = "";
             for (const node of nodes) {
-                if (!node.id) continue;
-                
-                const x = parseFloat(node.x || 0);
-                const y = parseFloat(node.y || 0);
-                const width = Math.max(parseFloat(node.width || this.canvas_constants.DEFAULT_NODE_WIDTH), this.canvas_constants.MIN_NODE_WIDTH);
-                const height = Math.max(parseFloat(node.height || this.canvas_constants.DEFAULT_NODE_HEIGHT), this.canvas_constants.MIN_NODE_HEIGHT);
-                const text = node.text || "";
-                const color = node.color || "";
-                
-                const divClasses = ["general-boxes"];
-                if (color && typeof color === 'string') {
-                    const sanitized = color.replace(/[^a-zA-Z0-9\-_]/g, '');
-                    if (sanitized) divClasses.push(`color-${sanitized}`);
-                }
-                const leftPos = x + this.canvas_constants.CANVAS_OFFSET_X;
-                const topPos = y + this.canvas_constants.CANVAS_OFFSET_Y;
-                
-                let processedContent = "";
-                if (text) {
-                    try {
-                        const processedMarkdown = await this.processMarkdown(text);
-                        processedContent = marked.parse(processedMarkdown);
-                    } catch (error) {
-                        processedContent = this.escapeHtml(text);
-                    }
-                }
-                
-                divPart += `<div class="${divClasses.join(' ')}" id="${this.escapeHtml(node.id)}" style="left:${leftPos}px;top:${topPos}px;width:${width}px;height:${height}px">\n${processedContent}\n</div>\n`;
-                
-                nodesById[node.id] = {
-                    left: [x, y + height/2],
-                    right: [x + width, y + height/2],
-                    top: [x + width/2, y],
-                    bottom: [x + width/2, y + height]
-                };
-                
-                maxX = Math.max(maxX, x + width);
-                maxY = Math.max(maxY, y + height);
+                const processedContent = await this.renderCanvasNodeText(node.text);
+                divPart += `<div class="${node.classes}" id="${this.escapeHtml(node.id)}" style="left:${node.left}px;top:${node.top}px;width:${node.width}px;height:${node.height}px">\n${processedContent}\n</div>\n`;
             }
-            
 
-            //process edges
-            const svgWidth = Math.max(maxX + this.canvas_constants.CANVAS_PADDING, this.canvas_constants.MIN_CANVAS_WIDTH);
-            const svgHeight = Math.max(maxY + this.canvas_constants.CANVAS_PADDING, this.canvas_constants.MIN_CANVAS_HEIGHT);
-            
             let svgPart = `<svg id="svg" width="${svgWidth}" height="${svgHeight}">\n`;
             let arrowPart = "";
-            
             for (const edge of edges) {
-                if (!edge.fromNode || !edge.toNode || !nodesById[edge.fromNode] || !nodesById[edge.toNode]) {
-                    continue;
-                }
-                
-                const fromSide = this.canvas_constants.VALID_SIDES.has(edge.fromSide) ? edge.fromSide : "right";
-                const toSide = this.canvas_constants.VALID_SIDES.has(edge.toSide) ? edge.toSide : "left";
-                
-                const nodeFrom = nodesById[edge.fromNode];
-                const nodeTo = nodesById[edge.toNode];
-                
-                const x1 = nodeFrom[fromSide][0] + this.canvas_constants.CANVAS_OFFSET_X;
-                const y1 = nodeFrom[fromSide][1] + this.canvas_constants.CANVAS_OFFSET_Y;
-                const x2 = nodeTo[toSide][0] + this.canvas_constants.CANVAS_OFFSET_X;
-                const y2 = nodeTo[toSide][1] + this.canvas_constants.CANVAS_OFFSET_Y;
-                
-                svgPart += `<line class="line" x1="${x1}" y1="${y1}" x2="${x2}" y2="${y2}"/>\n`;
-                if (toSide === "left") {
-                    arrowPart += `<i class="arrow ${toSide}" style="left:${x2 - 10}px;top:${y2 - 5}px;"></i>\n`;
-                }
-                else {
-                    arrowPart += `<i class="arrow ${toSide}" style="left:${x2 - 5}px;top:${y2 - 10}px;"></i>\n`;
-                }
+                svgPart += `<line class="line" x1="${edge.x1}" y1="${edge.y1}" x2="${edge.x2}" y2="${edge.y2}"/>\n`;
+                arrowPart += `<i class="arrow ${edge.side}" style="left:${edge.arrowLeft}px;top:${edge.arrowTop}px;"></i>\n`;
             }
             svgPart += "</svg>\n";
             
@@ -152,7 +148,107 @@ class ObsidianProcessor {
         }
     }
 
-    async processBase(yamlContent) {
+    layoutCanvas(rawNodes, rawEdges) {
+        // Positions and sizes of every node and edge, in pixels inside #innard
+        const constants = this.canvas_constants;
+        const nodes = [];
+        const nodesById = {};
+        let maxX = 0;
+        let maxY = 0;
+
+        for (const node of rawNodes) {
+            if (!node.id) continue;
+            
+            const x = parseFloat(node.x || 0);
+            const y = parseFloat(node.y || 0);
+            const width = Math.max(parseFloat(node.width || constants.DEFAULT_NODE_WIDTH), constants.MIN_NODE_WIDTH);
+            const height = Math.max(parseFloat(node.height || constants.DEFAULT_NODE_HEIGHT), constants.MIN_NODE_HEIGHT);
+            const color = node.color || "";
+            
+            const divClasses = ["general-boxes"];
+            if (color && typeof color === 'string') {
+                const sanitized = color.replace(/[^a-zA-Z0-9\-_]/g, '');
+                if (sanitized) divClasses.push(`color-${sanitized}`);
+            }
+
+            nodes.push({
+                id: node.id,
+                classes: divClasses.join(' '),
+                left: x + constants.CANVAS_OFFSET_X,
+                top: y + constants.CANVAS_OFFSET_Y,
+                width: width,
+                height: height,
+                text: node.text || "",
+            });
+            nodesById[node.id] = {
+                left: [x, y + height/2],
+                right: [x + width, y + height/2],
+                top: [x + width/2, y],
+                bottom: [x + width/2, y + height]
+            };
+            
+            maxX = Math.max(maxX, x + width);
+            maxY = Math.max(maxY, y + height);
+        }
+
+        const edges = [];
+        for (const edge of rawEdges) {
+            if (!edge.fromNode || !edge.toNode || !nodesById[edge.fromNode] || !nodesById[edge.toNode]) {
+                continue;
+            }
+            
+            const fromSide = constants.VALID_SIDES.has(edge.fromSide) ? edge.fromSide : "right";
+            const toSide = constants.VALID_SIDES.has(edge.toSide) ? edge.toSide : "left";
+            
+            const x1 = nodesById[edge.fromNode][fromSide][0] + constants.CANVAS_OFFSET_X;
+            const y1 = nodesById[edge.fromNode][fromSide][1] + constants.CANVAS_OFFSET_Y;
+            const x2 = nodesById[edge.toNode][toSide][0] + constants.CANVAS_OFFSET_X;
+            const y2 = nodesById[edge.toNode][toSide][1] + constants.CANVAS_OFFSET_Y;
+
+            edges.push({
+                x1: x1, y1: y1, x2: x2, y2: y2,
+                side: toSide,
+                arrowLeft: toSide === "left" ? x2 - 10 : x2 - 5,
+                arrowTop: toSide === "left" ? y2 - 5 : y2 - 10,
+            });
+        }
+
+        return {
+            nodes: nodes,
+            edges: edges,
+            svgWidth: Math.max(maxX + constants.CANVAS_PADDING, constants.MIN_CANVAS_WIDTH),
+            svgHeight: Math.max(maxY + constants.CANVAS_PADDING, constants.MIN_CANVAS_HEIGHT),
+        };
+    }
+
+    async renderCanvasNodeText(text) {
+        if (!text) return "";
+        try {
+            const processedMarkdown = await this.processMarkdown(text);
+            return this.restoreMath(marked.parse(processedMarkdown));
+        } catch (error) {
+            return this.escapeHtml(text);
+        }
+    }
+
+    async buildVirtualCanvas(nodes, edges, svgWidth, svgHeight) {
+        // Prerendering has no browser to render node text later, so it is rendered into the data now
+        if (window.omthPrerender) {
+            for (const node of nodes) {
+                node.html = await this.renderCanvasNodeText(node.text);
+                delete node.text;
+            }
+        }
+        const data = JSON.stringify({ nodes: nodes, edges: edges }).replace(/</g, '\\u003c');
+        return `<div id="outer-box" class="virtual-canvas">
+<div id="scrollable-box">
+<div id="innard" style="width:${svgWidth}px;height:${svgHeight}px"><svg id="svg" width="${svgWidth}" height="${svgHeight}"></svg></div>
+</div>
+<script type="application/json" class="canvas-data">${data}</script>
+</div>`;
+    }
+
+    async processBase(yamlContent, fileId = null) {
         try {
             const data = JSON.parse(yamlContent);
             console.log('Parsed base data:', data);
@@ -182,7 +278,9 @@ class ObsidianProcessor {
                 }
             }
 
-            const allFileIds = Object.keys(fileProperties);
+            // Rows evaluated at build time, one list per view; without them every view is filtered here
+            const precomputed = baseViews[fileId] || null;
+            const allFileIds = precomputed ? [] : Object.keys(fileProperties);
             console.log('All file IDs:', allFileIds.length);
             
             const allLinks = [];
@@ -207,7 +305,7 @@ class ObsidianProcessor {
             }
 
             if (data.views.length === 1) {
-                return await this.renderSingleView(data.views[0], allLinks, props, data.filters);
+                return await this.renderSingleView(data.views[0], allLinks, props, data.filters, precomputed && precomputed[0]);
             }
 
             const baseId = `base-${Date.now()}-${Math.floor(Math.random() * 1000)}`;
@@ -228,7 +326,7 @@ class ObsidianProcessor {
                 const activeClass = i === 0 ? 'active' : '';
                 tabsHtml += `<div id="${baseId}-tab-${i}" class="base-tab-content btc-${baseId} ${activeClass}">`;
                 
-                const viewContent = await this.renderSingleView(view, allLinks, props, data.filters);
+                const viewContent = await this.renderSingleView(view, allLinks, props, data.filters, precomputed && precomputed[i]);
                 tabsHtml += viewContent;
                 
                 tabsHtml += '</div>';
@@ -244,23 +342,26 @@ class ObsidianProcessor {
         }
     }
 
-    async renderSingleView(viewConfig, allLinks, props, globalFilters) {
+    async renderSingleView(viewConfig, allLinks, props, globalFilters, precomputedLinks = null) {
         console.log('Processing view:', viewConfig);
         
-        let filteredLinks = allLinks;
-        if (globalFilters) {
-            filteredLinks = this.processFilters(allLinks, globalFilters);
-        }
-        
-        if (viewConfig.filters) {
-            filteredLinks = this.processFilters(filteredLinks, viewConfig.filters);
+        let sortedLinks = precomputedLinks;
+        if (!sortedLinks) {
+            let filteredLinks = allLinks;
+            if (globalFilters) {
+                filteredLinks = this.processFilters(allLinks, globalFilters);
+            }
+            
+            if (viewConfig.filters) {
+                filteredLinks = this.processFilters(filteredLinks, viewConfig.filters);
+            }
+            
+            console.log('Filtered links for view:', filteredLinks);
+            
+            const sortRules = viewConfig.sort || [];
+            sortedLinks = this.sortLinks(filteredLinks, sortRules);
         }
         
-        console.log('Filtered links for view:', filteredLinks);
-        
-        const sortRules = viewConfig.sort || [];
-        const sortedLinks = this.sortLinks(filteredLinks, sortRules);
-        
         const viewType = viewConfig.type;
         console.log('Processing view type:', viewType);
         
@@ -346,9 +447,9 @@ class ObsidianProcessor {
         return '<div class="error">Unsupported view type</div>';
     }
 
-    async processFile(content, fileType) {
+    async processFile(content, fileType, fileId = null) {
         if (fileType == "base") {
-            return [await this.processBase(content), []]
+            return [await this.processBase(content, fileId), []]
         } else if (fileType == "canvas") {
             return [await this.processCanvas(content), []];
         } else {
@@ -453,7 +554,7 @@ class ObsidianProcessor {
                                     return false;
                                 }
                                 const actualValue = fileProps.notes[pre];
-                                const result = actualValue === expectedValue;
+                                const result = Array.isArray(actualValue) ? actualValue.includes(expectedValue) : actualValue === expectedValue;
                                 console.log(`  note.${pre} "${actualValue}" == "${expectedValue}":`, result);
                                 return result;
                             }
@@ -472,8 +573,8 @@ class ObsidianProcessor {
                                     console.log(`  No notes for property "${pre}" - treating as != "${expectedValue}": true`);
                                     return true;
                                 }
-                                const actualValue = fileProps.notes[pre].slice(1, -1);
-                                const result = !actualValue || actualValue !== expectedValue;
+                                const actualValue = fileProps.notes[pre];
+                                const result = Array.isArray(actualValue) ? !actualValue.includes(expectedValue) : actualValue !== expectedValue;
                                 console.log(`  note.${pre} "${actualValue}" != "${expectedValue}":`, result);
                                 return result;
                             }
@@ -558,48 +659,28 @@ class ObsidianProcessor {
             return this.escapeHtml(value || '');
         }
         
-        if (propKey.startsWith('note.')) {
-            if (!fileProps.notes) return '';
-            
-            const noteProp = propKey.substring(5);
-            let noteValue = fileProps.notes[noteProp];
-            console.log(noteValue)
-            
-            if (!noteValue) return '';
-            
-            if (typeof noteValue === 'string' && noteValue.startsWith('[[') && noteValue.endsWith(']]')) {
-                const linkContent = noteValue.slice(2, -2);
-                
-                if (linkContent.includes('.')) {
-                    const extension = linkContent.split('.').pop().toLowerCase();
-                    if (this.image_types.has(extension)) {
-                        const imageUrl = this.getLinkHref(linkContent);
-                        if (imageUrl !== '#file-not-found') {
-                            return imageUrl;
-                        }
-                        return '';
-                    }
-                }
-                
-                const targetUrl = this.getLinkHref(linkContent);
-                if (targetUrl !== '#file-not-found') {
-                    return targetUrl;
-                }
-                return '';
+        if (!fileProps.notes) return '';
+
+        const noteProp = propKey.startsWith('note.') ? propKey.substring(5) : propKey;
+        return this.formatPropertyValue(fileProps.notes[noteProp], link);
+    }
+
+    // Frontmatter values arrive as strings or lists of strings; list items are formatted one by one
+    async formatPropertyValue(noteValue, link) {
+        if (Array.isArray(noteValue)) {
+            const items = [];
+            for (const item of noteValue) {
+                const formatted = await this.formatPropertyValue(item, link);
+                if (formatted) items.push(formatted);
             }
-            
-            const processedContent = await this.processMarkdown(noteValue, link);
-            return processedContent;
+            return items.join(', ');
         }
-        
-        if (!fileProps.notes) return '';
-        
-        let noteValue = fileProps.notes[propKey];
+
         if (!noteValue) return '';
-        
+
         if (typeof noteValue === 'string' && noteValue.startsWith('[[') && noteValue.endsWith(']]')) {
             const linkContent = noteValue.slice(2, -2);
-            
+
             if (linkContent.includes('.')) {
                 const extension = linkContent.split('.').pop().toLowerCase();
                 if (this.image_types.has(extension)) {
@@ -610,14 +691,14 @@ class ObsidianProcessor {
                     return '';
                 }
             }
-            
+
             const targetUrl = this.getLinkHref(linkContent);
             if (targetUrl !== '#file-not-found') {
                 return targetUrl;
             }
             return '';
         }
-        
+
         const processedContent = await this.processMarkdown(noteValue, link);
         return processedContent;
     }
@@ -649,6 +730,7 @@ class ObsidianProcessor {
             const noteProp = property.substring(5);
             if (!fileProps.notes) return '';
             const noteValue = fileProps.notes[noteProp];
+            if (Array.isArray(noteValue)) return noteValue.join(', ');
             
             if (typeof noteValue === 'string' && noteValue.startsWith('"') && noteValue.endsWith('"')) {
                 return noteValue.slice(1, -1);
@@ -659,6 +741,7 @@ class ObsidianProcessor {
         
         if (!fileProps.notes) return '';
         const noteValue = fileProps.notes[property];
+        if (Array.isArray(noteValue)) return noteValue.join(', ');
         
         if (typeof noteValue === 'string' && noteValue.startsWith('"') && noteValue.endsWith('"')) {
             return noteValue.slice(1, -1);
@@ -685,7 +768,7 @@ class ObsidianProcessor {
 
         for (const match of matches) {
             const fullMatch = match[0];
-            const link = match[1].split('|')[0];
+            const link = match[1].split('|')[0].trim();
             const matchStart = match.index + totalOffset;
             const matchEnd = matchStart + fullMatch.length;
 
@@ -752,12 +835,13 @@ class ObsidianProcessor {
         let fileName, section;
         if (link.includes('#')) {
             [fileName, section] = link.split('#', 2);
+            fileName = fileName.trim();
         } else {
             fileName = link;
             section = null;
         }
 
-        let originalFileContent = this.findFileContent(fileName);
+        let originalFileContent = await this.findFileContent(fileName);
         let fileType = this.getFileType(fileName);
         
         if (!originalFileContent) {
@@ -777,9 +861,10 @@ class ObsidianProcessor {
 
         try {
             if (fileType === 'canvas') {
-                processedContent = await this.processCanvas(originalFileContent);
+                // Pages embedding a canvas don't load json_canvas.js, so render all of it
+                processedContent = await this.processCanvas(originalFileContent, false);
             } else if (fileType === 'base') {
-                processedContent = await this.processBase(originalFileContent);
+                processedContent = await this.processBase(originalFileContent, resolveFileId(fileName));
             } else {
                 let fileContent;
                 if (section) {
@@ -852,45 +937,13 @@ class ObsidianProcessor {
         return `<span class="broken-link">![[${imageLink}]]</span>`;
     }
 
-    findFileContent(fileName) {
-        console.log('Looking for file content:', fileName);
-        console.log('Available files:', Object.keys(fileContentMap));
-        fileName = fileName.replace(/\//g, "\\");
-        
-        if (fileContentMap.hasOwnProperty(fileName)) {
-            console.log('Found exact match:', fileName);
-            return getFile(fileName);
-        }
-        
-        if (fileContentMap.hasOwnProperty(fileName + '.md')) {
-            console.log('Found with .md extension:', fileName + '.md');
-            return getFile(fileName + '.md');
-        }
-
-        const lowerFileName = fileName.toLowerCase();
-        for (const [key, content] of Object.entries(fileContentMap)) {
-            if (key.toLowerCase() === lowerFileName || key.toLowerCase() === lowerFileName + '.md') {
-                console.log('Found case-insensitive match:', key);
-                return fileContents[content];
-            }
-        }
-
-        const baseName = fileName.split('/').pop().split('\\').pop();
-        const matches = Object.keys(fileContents).filter(k => {
-            const keyBase = k.split('/').pop().split('\\').pop();
-            return keyBase === baseName || keyBase === baseName + '.md';
-        });
-        
-        if (matches.length === 1) {
-            console.log('Found basename match:', matches[0]);
-            return getFile(matches[0]);
-        } else if (matches.length > 1) {
-            console.log('Multiple basename matches found, using first:', matches[0]);
-            return getFile(matches[0]);
+    async findFileContent(fileName) {
+        const fileId = resolveFileId(fileName);
+        if (fileId === null) {
+            console.log('File not found:', fileName);
+            return null;
         }
-
-        console.log('File not found:', fileName);
-        return null;
+        return loadFileContent(fileId);
     }
 
     extractSectionWithFootnotes(fullContent, sectionName) {
@@ -1064,53 +1117,43 @@ class ObsidianProcessor {
         if (fileName === ''){
             return ""
         }
-        let target = (fileLinks[fileName] || fileLinks[fileName + '.md'] || '#file-not-found').toLowerCase()
-            .replace(/\\/g, '/')
-            .replace(/\.md$/i, '.html');
-        
-        if (target === '#file-not-found'){
+        const fileId = resolveFileId(fileName);
+        if (fileId === null || !fileHrefs.hasOwnProperty(fileId)) {
             console.log("Not found: " + fileName)
+            return '#file-not-found';
         }
+        return this.getFileHref(fileId);
+    }
 
+    // Path from the current page to a file's export; fileHrefs holds each one relative to the site root
+    getFileHref(fileId) {
         const article = document.querySelector("article");
         const attributeValue = article.getAttribute('data-current-file');
-        let relCurParts = attributeValue.replace(/\\/g, '/').replace(' ', '-').toLowerCase().split('/').slice(0, -1)
+        let relCurParts = attributeValue.replace(/\\/g, '/').replace(/ /g, '-').toLowerCase().split('/').slice(0, -1)
 
-        let relTgtParts = target.split('/').filter(Boolean);
+        let relTgtParts = fileHrefs[fileId].split('/').filter(Boolean);
 
         let i = 0;
         while (i < relCurParts.length && i < relTgtParts.length && relCurParts[i] === relTgtParts[i]) {
             i++;
         }
 
-        const relativePath = [...Array(relCurParts.length - i).fill('..'), ...relTgtParts.slice(i)].join('/');
+        return [...Array(relCurParts.length - i).fill('..'), ...relTgtParts.slice(i)].join('/');
+    }
 
-        return relativePath.replace(/ /g, '-');
+    buildBacklinksHTML(sourceIds) {
+        let html = '<h2>Backlinks</h2>\n<ul>\n';
+        for (const sourceId of sourceIds) {
+            const props = fileProperties[sourceId];
+            if (!props) continue;
+            const name = props.ext === 'md' ? props.file.replace(/\.md$/, '') : props.file;
+            html += `<li><a href="${this.getFileHref(sourceId)}">${this.escapeHtml(name)}</a></li>\n`;
+        }
+        return html + '</ul>\n';
     }
 
     findFileIdByLink(link) {
-        if (fileContentMap[link]) {
-            return fileContentMap[link];
-        }
-        
-        if (!link.includes('.') && fileContentMap[link + '.md']) {
-            return fileContentMap[link + '.md'];
-        }
-        
-        for (const [fileId, props] of Object.entries(fileProperties)) {
-            if (props.file) {
-                if (props.file === link) {
-                    return fileId;
-                }
-                
-                const basename = props.file.replace(/\.[^/.]+$/, "");
-                if (basename === link) {
-                    return fileId;
-                }
-            }
-        }
-        
-        return null;
+        return resolveFileId(link);
     }
 
     findTableBoundaries(lines, endLine) {
@@ -1360,11 +1403,12 @@ class ObsidianProcessor {
                     .replace(/'/g, '%27');
             }
 
-            let url = this.getLinkHref(pageName);
-            if (section) url += '#' + section;
+            // Trimmed like LinkGraph.link_target, so pages agree with the build's backlinks and broken-link warnings
+            let url = this.getLinkHref(pageName.trim());
             if (url === '#file-not-found') {
                 return `<span class="broken-link">${match}</span>`;
             }
+            if (section) url += '#' + section;
             return `<a href="${url}" class="wikilink">${this.escapeHtml(alias)}</a>`;
         });
     }
@@ -1725,7 +1769,7 @@ class ObsidianProcessor {
         let ret_str = '';
         let checkboxPrefix = 1;
         
-        const fileTuples = Object.entries(fileLinks).sort((a, b) => {
+        const fileTuples = Object.keys(fileHrefs).map(fileId => [fileId, '.\\' + fileProperties[fileId].path]).sort((a, b) => {
             const aPath = a[1];
             const bPath = b[1];
             
@@ -1740,10 +1784,10 @@ class ObsidianProcessor {
         });
         
         for (let i = 0; i < fileTuples.length; i++) {
-            const [link, filepath] = fileTuples[i];
+            const [fileId, filepath] = fileTuples[i];
             
             if (i === 0 || (i > 0 && fileTuples[i-1][1] !== filepath)) {
-                const offsetLink = this.getLinkHref(link);
+                const offsetLink = this.getFileHref(fileId);
                 
                 if (i > 0) {
                     const prevLastSlash = fileTuples[i-1][1].lastIndexOf("\\");
@@ -1814,7 +1858,7 @@ class ObsidianProcessor {
                         }
                     }
                 }
-                const fileName = link.split('/').pop().replace(/\.md$/i, '');
+                const fileName = fileProperties[fileId].file.replace(/\.md$/i, '');
                 ret_str += '<li>' + `<a href="${offsetLink}">${fileName}</a>` + '</li>';
             }
         }
@@ -1822,31 +1866,15 @@ class ObsidianProcessor {
     }
 
     generateSearchBarHTML() {
-        const searchDict = {};
-        const seenValues = new Set();
-        
-        for (const [key, capsValue] of Object.entries(fileLinks)) {
-            const value = capsValue.toLowerCase()
-            if (!seenValues.has(value)) {
-                searchDict[key] = value;
-                seenValues.add(value);
-            }
-        }
-        
-        let searchHtml = '<div><input type="text" id="searchInput" onkeyup="searchForArticle()" placeholder="Search by name">';
+        let searchHtml = '<div><input type="text" id="searchInput" oninput="scheduleSearch()" placeholder="Search by name">';
         searchHtml += '<label class="switch"><input type="checkbox" id="toggleByText" onchange="updatePlaceholder()"><span class="slider"></span></label></div>'
         
         searchHtml += '<ul id="articles">';
         
-        for (const [key, value] of Object.entries(searchDict)) {
-            const rightPartLink = value.substring(1).replace(/ /g, "-");
-            const link = this.getLinkHref(key);
-            const displayPath = rightPartLink.substring(1).replace(/\\/g, " > ");
-            const fileName = key.split('/').pop();
-            const fileID = this.findFileIdByLink(key.replace(/\//g, "\\"));
-            if(fileID === null){
-                console.log(key)
-            }
+        for (const [fileID, href] of Object.entries(fileHrefs)) {
+            const link = this.getFileHref(fileID);
+            const displayPath = href.replace(/\//g, " > ");
+            const fileName = fileProperties[fileID].file.replace(/\.md$/i, '');
             
             searchHtml += `<li><a searchText="${link}" searchID="${fileID}" href="${link}">${fileName}<br><sub class="fileloc">${displayPath}</sub></a></li>`;
         }
@@ -1889,37 +1917,40 @@ function slugify(text) {
         .replace(/-+$/, '');             // Remove trailing hyphens
 }
 
-marked.setOptions({
-    breaks: true,
-    gfm: true,
-    tables: true,
-    headerIds: true,
-    headerPrefix: '',
-    pedantic: false,
-    sanitize: false,
-    smartLists: true,
-    smartypants: false
-});
+// Prerendered pages ship without marked.js, since their Markdown has already been converted
+if (typeof marked !== 'undefined') {
+    marked.setOptions({
+        breaks: true,
+        gfm: true,
+        tables: true,
+        headerIds: true,
+        headerPrefix: '',
+        pedantic: false,
+        sanitize: false,
+        smartLists: true,
+        smartypants: false
+    });
 
-const renderer = new marked.Renderer();
-renderer.heading = function(text, level, raw) {
-    const escapedText = slugify(text);
-    return `<span class="anchor" id="${escapedText}"></span><h${level}>${text}</h${level}>`;
-};
-const originalLink = renderer.link;
+    const renderer = new marked.Renderer();
+    renderer.heading = function(text, level, raw) {
+        const escapedText = slugify(text);
+        return `<span class="anchor" id="${escapedText}"></span><h${level}>${text}</h${level}>`;
+    };
+    const originalLink = renderer.link;
 
-renderer.link = function(href, title, text) {
-    const originalOutput = originalLink.call(this, href, title, text);
+    renderer.link = function(href, title, text) {
+        const originalOutput = originalLink.call(this, href, title, text);
     
-    const isExternalLink = href && (href.startsWith('http://') || href.startsWith('https://'));
-    console.log(text)
-    if (isExternalLink) {
-        return `<span class="external-link-wrapper">${originalOutput}<span class="external-link-icon"><i data-lucide="external-link"></i></span></span>`;
-    }
+        const isExternalLink = href && (href.startsWith('http://') || href.startsWith('https://'));
+        console.log(text)
+        if (isExternalLink) {
+            return `<span class="external-link-wrapper">${originalOutput}<span class="external-link-icon"><i data-lucide="external-link"></i></span></span>`;
+        }
     
-    return originalOutput;
-};
-marked.setOptions({ renderer: renderer });
+        return originalOutput;
+    };
+    marked.setOptions({ renderer: renderer });
+}
 
 async function renderContent() {
     const article = document.querySelector("article");
@@ -1929,19 +1960,38 @@ async function renderContent() {
     try {
         const fileType = article.getAttribute('data-type');
         const attributeValue = article.getAttribute('data-current-file');
-        const content = getFile(attributeValue);
-        
-        const [processedHTML, headers] = await processor.processFile(content, fileType);
+
+        const fileId = resolveFileId(attributeValue);
+        const graphEntry = linkGraph[fileId] || {};
+
+        // Prerendered pages already contain their article and table of contents
+        if (article.getAttribute('data-prerendered') !== 'true') {
+            // Fetch every transitive embed up front instead of one at a time during resolution
+            const [content] = await Promise.all([loadFileContent(fileId), ...(graphEntry.embeds || []).map(loadFileContent)]);
+            
+            const [processedHTML, headers] = await processor.processFile(content, fileType, fileId);
+
+            if (headers.length > 0) {
+                const tocHtml = processor.buildTableOfContents(headers);
+                document.getElementById('toc-content').innerHTML = tocHtml;
+                document.getElementById('table-of-contents').style.removeProperty('display');
+            }
+            article.innerHTML = processedHTML;
+        }
+
+        if (window.JsonCanvas) {
+            JsonCanvas.mountAll(article);
+        }
+
+        if (graphEntry.backlinks) {
+            const backlinks = document.getElementById('backlinks');
+            backlinks.innerHTML = processor.buildBacklinksHTML(graphEntry.backlinks);
+            backlinks.style.removeProperty('display');
+        }
 
         const searchBarHtml = processor.generateSearchBarHTML();
         document.getElementById("searchbar").innerHTML = searchBarHtml;
-        if (headers.length > 0) {
-            const tocHtml = processor.buildTableOfContents(headers);
-            document.getElementById('toc-content').innerHTML = tocHtml;
-            document.getElementById('table-of-contents').style.removeProperty('display');
-        }
         document.getElementById("navbar").innerHTML = processor.generateFileTreeHTML();
-        article.innerHTML = processedHTML;
         
         if (window.MathJax && window.MathJax.typesetPromise) {
             try {
@@ -1,67 +1,209 @@
-function searchForArticle() {
+const SEARCH_DEBOUNCE_MS = 150;
+const MAX_CONTENT_RESULTS = 50;
+
+const searchShards = {};
+const searchShardRequests = {};
+let searchGeneration = 0;
+let searchTimer = null;
+let lastContentSearch = null;
+
+function registerSearchShard(prefix, tokens) {
+    searchShards[prefix] = tokens;
+}
+
+function loadScript(src) {
+    return new Promise(resolve => {
+        const script = document.createElement('script');
+        script.src = src;
+        script.onload = () => resolve(true);
+        script.onerror = () => resolve(false);
+        document.head.appendChild(script);
+    });
+}
+
+function loadSearchShard(prefix) {
+    if (searchShards.hasOwnProperty(prefix)) {
+        return Promise.resolve(searchShards[prefix]);
+    }
+
+    // Unsharded exports keep every prefix in one script, so a single request serves all lookups
+    const src = searchIndexSharded ? `${siteRoot}search/${prefix}.js` : `${siteRoot}search-index.js`;
+    if (!searchShardRequests[src]) {
+        searchShardRequests[src] = loadScript(src);
+    }
+    return searchShardRequests[src].then(() => {
+        if (!searchShards.hasOwnProperty(prefix)) {
+            searchShards[prefix] = {};
+        }
+        return searchShards[prefix];
+    });
+}
+
+async function lookupTerm(term, isPrefix) {
+    const shard = await loadSearchShard(term.substring(0, 2));
+    if (!isPrefix || term.length < 2) {
+        return shard[term] || [];
+    }
+
+    const postings = [];
+    for (const token in shard) {
+        if (token.startsWith(term)) {
+            postings.push(...shard[token]);
+        }
+    }
+    return postings;
+}
+
+async function searchContent(query) {
+    const terms = normalize(query).split(/\s+/).filter(Boolean);
+    if (terms.length === 0) return [];
+
+    // Extending a query whose last term was prefix-matched can only narrow its results,
+    // so those results become the candidate set
+    let candidates = null;
+    if (lastContentSearch && lastContentSearch.prefixMatched && query.startsWith(lastContentSearch.query)) {
+        candidates = lastContentSearch.scores;
+    }
+
+    let scores = null;
+    for (let i = 0; i < terms.length; i++) {
+        const postings = await lookupTerm(terms[i], i === terms.length - 1);
+        const termScores = new Map();
+        for (const [fileId, count, line] of postings) {
+            if (candidates && !candidates.has(fileId)) continue;
+            const existing = termScores.get(fileId);
+            if (existing) {
+                existing.score += count;
+                existing.line = Math.min(existing.line, line);
+            } else {
+                termScores.set(fileId, { score: count, line: line });
+            }
+        }
+
+        if (scores === null) {
+            scores = termScores;
+        } else {
+            for (const [fileId, entry] of scores) {
+                const termEntry = termScores.get(fileId);
+                if (termEntry) {
+                    entry.score += termEntry.score;
+                } else {
+                    scores.delete(fileId);
+                }
+            }
+        }
+    }
+
+    lastContentSearch = { query: query, scores: scores, prefixMatched: terms[terms.length - 1].length >= 2 };
+    return [...scores.entries()]
+        .sort((a, b) => b[1].score - a[1].score)
+        .slice(0, MAX_CONTENT_RESULTS);
+}
+
+function scheduleSearch() {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(searchForArticle, SEARCH_DEBOUNCE_MS);
+}
+
+function setSnippet(li, snippetHtml) {
+    const a = li.querySelector("a");
+    const existingSnippet = li.querySelector('.content-snippet');
+    if (snippetHtml) {
+        if (existingSnippet) {
+            existingSnippet.innerHTML = snippetHtml;
+        } else {
+            const snippetDiv = document.createElement('div');
+            snippetDiv.className = 'content-snippet';
+            snippetDiv.innerHTML = snippetHtml;
+            a.appendChild(snippetDiv);
+        }
+    } else if (existingSnippet) {
+        existingSnippet.remove();
+    }
+}
+
+function restoreArticleOrder(ul, liElements) {
+    [...liElements]
+        .sort((a, b) => a.dataset.order - b.dataset.order)
+        .forEach(li => ul.appendChild(li));
+}
+
+async function searchForArticle() {
+    const generation = ++searchGeneration;
     const pane = document.getElementById("searchbar");
     const input = pane.querySelector('#searchInput');
     const query = input.value.trim();
     
     const ul = pane.querySelector("#articles");
     const liElements = ul.getElementsByTagName('li');
+    for (let i = 0; i < liElements.length; i++) {
+        if (liElements[i].dataset.order === undefined) liElements[i].dataset.order = i;
+    }
     
     if(!query) {
+        lastContentSearch = null;
+        restoreArticleOrder(ul, liElements);
         for (const li of liElements) {
             li.style.display = "";
-            const existingSnippet = li.querySelector('.content-snippet');
-            if(existingSnippet) existingSnippet.remove();
+            setSnippet(li, "");
         }
         return;
     }
     
-    const queryLower = normalize(query);
     const checkbox = document.getElementById('toggleByText');
 
-    for (const li of liElements) {
-        const a = li.querySelector("a");
-        const searchText = normalize(a.getAttribute("searchText") || "");
-        const searchID = a.getAttribute("searchID");
-        const txtValue = normalize(a.textContent || a.innerText);
-
-        let matches = false;
-        let contentPreview = "";
-        
-        if(checkbox.checked){
-            const fullContent = fileContents[searchID];
-            
-            if(!searchText.endsWith(".base.html") && searchText.endsWith(".html") && fullContent) {
-                const lines = fullContent.split('\n');
-                for(let i = 0; i < lines.length; i++) {
-                    const line = lines[i];
-                    
-                    if(normalize(line).includes(queryLower)) {
-                        matches = true;
-                        contentPreview = generateSnippetFromLine(line, query);
-                        break;
-                    }
-                }
-            }
-        } else {
+    if(!checkbox.checked) {
+        lastContentSearch = null;
+        restoreArticleOrder(ul, liElements);
+        for (const li of liElements) {
+            const a = li.querySelector("a");
+            const searchText = normalize(a.getAttribute("searchText") || "");
+            const txtValue = normalize(a.textContent || a.innerText);
             const combined = `${txtValue} ${searchText}`;
-            matches = matchesByParts(combined, query);
-        }
 
-        li.style.display = matches ? "" : "none";
-        
-        const existingSnippet = li.querySelector('.content-snippet');
-        if(matches && checkbox.checked && contentPreview) {
-            if(existingSnippet) {
-                existingSnippet.innerHTML = contentPreview;
-            } else {
-                const snippetDiv = document.createElement('div');
-                snippetDiv.className = 'content-snippet';
-                snippetDiv.innerHTML = contentPreview;
-                a.appendChild(snippetDiv);
-            }
-        } else if(existingSnippet) {
-            existingSnippet.remove();
+            li.style.display = matchesByParts(combined, query) ? "" : "none";
+            setSnippet(li, "");
         }
+        return;
+    }
+
+    const results = await searchContent(query);
+    if(generation !== searchGeneration) return;
+
+    const itemsById = {};
+    for (const li of liElements) {
+        itemsById[li.querySelector("a").getAttribute("searchID")] = li;
+        li.style.display = "none";
+        setSnippet(li, "");
+    }
+
+    // Matching articles move to the top of the list in rank order
+    const terms = normalize(query).split(/\s+/).filter(Boolean);
+    const ranked = results.filter(([fileId]) => itemsById[fileId]);
+    for (let i = ranked.length - 1; i >= 0; i--) {
+        const li = itemsById[ranked[i][0]];
+        li.style.display = "";
+        ul.insertBefore(li, ul.firstChild);
+    }
+
+    const contents = await Promise.all(ranked.map(([fileId]) => loadFileContent(fileId)));
+    if(generation !== searchGeneration) return;
+    ranked.forEach(([fileId, entry], i) => {
+        // Canvas postings count lines of the node text the index was built from, not of the JSON
+        const isCanvas = (itemsById[fileId].querySelector("a").getAttribute("searchText") || "").endsWith(".canvas.html");
+        const text = isCanvas ? canvasText(contents[i] || "") : (contents[i] || "");
+        const line = text.split('\n')[entry.line] || "";
+        setSnippet(itemsById[fileId], generateSnippetFromLine(line, terms));
+    });
+}
+
+// The text nodes of a .canvas file, one per line, as SearchIndex.canvas_text indexes them
+function canvasText(content) {
+    try {
+        const nodes = JSON.parse(content).nodes || [];
+        return nodes.filter(node => node && typeof node.text === 'string').map(node => node.text).join('\n');
+    } catch (error) {
+        return "";
     }
 }
 
@@ -95,13 +237,13 @@ function matchesByParts(text, query) {
     return true;
 }
 
-function generateSnippetFromLine(line, searchTerm) {
+function generateSnippetFromLine(line, searchTerms) {
     let snippet = line.trim();
-    const searchTermLower = normalize(searchTerm);
     const snippetLower = normalize(snippet);
-    const pos = snippetLower.indexOf(searchTermLower);
+    const searchTerm = searchTerms.find(term => snippetLower.includes(term));
     
-    if(pos === -1) return "";
+    if(!searchTerm) return "";
+    const pos = snippetLower.indexOf(searchTerm);
     
     const maxLength = 120;
     if(snippet.length > maxLength) {
@@ -114,8 +256,8 @@ function generateSnippetFromLine(line, searchTerm) {
         if(end < line.trim().length) snippet = snippet + "...";
     }
     
-    const escapedTerm = escapeRegex(searchTerm);
-    const regex = new RegExp(escapedTerm, 'gi');
+    const escapedTerms = searchTerms.map(escapeRegex).join('|');
+    const regex = new RegExp(escapedTerms, 'gi');
     snippet = snippet.replace(regex, '<mark>$&</mark>');
     
     return `<sub class="content-preview">${snippet}</sub>`;
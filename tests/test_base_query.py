@@ -0,0 +1,34 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_segments.BaseQuery import BaseQuery
+from python_segments.LinkResolver import LinkResolver
+
+class BaseQuerySortTest(unittest.TestCase):
+    def query(self, names):
+        files = [f".\\{name}.md" for name in names]
+        file_ids = {file: f"id{position}" for position, file in enumerate(files)}
+        file_properties = {file_ids[file]: {"path": file[2:], "file": file[2:], "folder": "", "ext": "md"}
+                           for file in files}
+        return BaseQuery(file_properties, LinkResolver(files, file_ids))
+
+    def sorted_names(self, names, direction="ASC"):
+        query = self.query(names)
+        return query.evaluate({"views": [{"type": "table", "sort": [{"property": "file.name", "direction": direction}]}]})[0]
+
+    def test_accented_names_sort_like_locale_compare(self):
+        # The order String.prototype.localeCompare gives in sortLinks
+        self.assertEqual(self.sorted_names(["Zeta", "émile", "Alpha", "Écrit"]), ["Alpha", "Écrit", "émile", "Zeta"])
+        self.assertEqual(self.sorted_names(["Zeta", "émile", "Alpha", "Écrit"], "DESC"), ["Zeta", "émile", "Écrit", "Alpha"])
+
+    def test_accents_only_break_ties(self):
+        self.assertEqual(self.sorted_names(["écrit", "ecrit", "eclair", "ölig", "oz"]), ["eclair", "ecrit", "écrit", "ölig", "oz"])
+
+    def test_punctuation_and_numbers_before_letters(self):
+        self.assertEqual(self.sorted_names(["b", "_draft", "10 x", "2 y"]), ["_draft", "2 y", "10 x", "b"])
+
+if __name__ == "__main__":
+    unittest.main()
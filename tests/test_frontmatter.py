@@ -0,0 +1,40 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ObsidianMarkdownToHtml import ObsidianMarkdownToHtml
+
+class FrontmatterTest(unittest.TestCase):
+    def setUp(self):
+        work = tempfile.TemporaryDirectory(prefix="omth-test-")
+        self.addCleanup(work.cleanup)
+        self.in_directory = os.path.join(work.name, "vault")
+        self.out_directory = os.path.join(work.name, "out")
+        os.makedirs(self.in_directory)
+
+    def export(self, files):
+        for name, text in files.items():
+            with open(os.path.join(self.in_directory, name), "w", encoding="utf-8") as f:
+                f.write(text)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            om2html = ObsidianMarkdownToHtml(self.in_directory, self.out_directory, build_date=False)
+        return om2html, output.getvalue()
+
+    def test_invalid_date_keeps_body(self):
+        om2html, output = self.export({"A.md": "---\ndate: 2024-02-30\n---\nThe body\n"})
+        self.assertIn("Ignoring invalid frontmatter", output)
+        self.assertEqual(om2html.file_contents[om2html.file_ids[".\\A.md"]], "The body\n")
+
+    def test_invalid_yaml_keeps_body(self):
+        om2html, output = self.export({"A.md": "---\ntags: [unclosed\n---\nThe body\n"})
+        self.assertIn("Ignoring invalid frontmatter", output)
+        self.assertEqual(om2html.file_contents[om2html.file_ids[".\\A.md"]], "The body\n")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ObsidianMarkdownToHtml import ObsidianMarkdownToHtml, PROFILE_NAME
+
+class ProfilerTest(unittest.TestCase):
+    def setUp(self):
+        work = tempfile.TemporaryDirectory(prefix="omth-test-")
+        self.addCleanup(work.cleanup)
+        self.work = work.name
+        self.in_directory = os.path.join(self.work, "vault")
+        self.out_directory = os.path.join(self.work, "out")
+        os.makedirs(self.in_directory)
+        with open(os.path.join(self.in_directory, "Note.md"), "w", encoding="utf-8") as f:
+            f.write("# Note\n\nA [[Note]] linking to itself.\n")
+
+    def export(self, **options):
+        with contextlib.redirect_stdout(io.StringIO()):
+            ObsidianMarkdownToHtml(self.in_directory, self.out_directory, build_date=False, **options).compile_webpages()
+
+    def test_cprofile_without_profile_writes_dump(self):
+        cprofile_path = os.path.join(self.work, "export.prof")
+        self.export(cprofile_path=cprofile_path)
+        self.assertTrue(os.path.exists(cprofile_path))
+        self.assertTrue(os.path.exists(os.path.join(self.out_directory, PROFILE_NAME)))
+
+    def test_profile_path(self):
+        report_path = os.path.join(self.work, "report.json")
+        self.export(profile=report_path)
+        self.assertTrue(os.path.exists(report_path))
+        self.assertFalse(os.path.exists(os.path.join(self.out_directory, PROFILE_NAME)))
+
+    def test_no_profile_writes_nothing(self):
+        self.export()
+        self.assertFalse(os.path.exists(os.path.join(self.out_directory, PROFILE_NAME)))
+
+if __name__ == "__main__":
+    unittest.main()